@@ -15,14 +15,1151 @@ Autor: María [Generado con Claude Code]
 Licencia: MIT
 """
 
+import io
 import os
+import copy
+import mmap
+import operator
+import tempfile
+import html
 import re
 import json
 import sys
-from collections import Counter, defaultdict
+import time
+import random
+import zlib
+import math
+import hashlib
+import sqlite3
+import unicodedata
+import signal
+import argparse
+import threading
+import multiprocessing
+from array import array
+from collections import Counter, defaultdict, deque
+from collections.abc import Set
+from contextlib import contextmanager
 from datetime import datetime
 
+try:
+    import numpy as np
+except ImportError:  # NumPy es opcional (exportación columnar, intervalos bootstrap, --estimar)
+    np = None
+
+# Palabras (letras, dígitos y guion bajo, incluidos acentos)
+_PATRON_PALABRA = re.compile(r'\w+')
+
+# Palabras con guiones internos y punto final opcional (mezzo-soprano, Sr.)
+_PATRON_TOKEN = re.compile(r'\w+(?:-\w+)*\.?')
+
+# Año en un nombre de archivo (1925_05_23_ONDAS.txt)
+_PATRON_ANIO = re.compile(r'(?<!\d)(?:1[5-9]|20)\d\d(?!\d)')
+
+
+def normalizar_texto(texto):
+    """Pasa a minúsculas y elimina tildes y diacríticos (María -> maria)"""
+    descompuesto = unicodedata.normalize('NFD', texto.lower())
+    return ''.join(c for c in descompuesto if unicodedata.category(c) != 'Mn')
+
+
+def prefijo_termino(termino, longitud):
+    """
+    Prefijo de un término para repartir el índice de términos en
+    fragmentos: sin tildes, en minúsculas y con '_' en lugar de lo que no
+    sea a-z o 0-9 ("María" -> "ma"). La web lo calcula igual en JavaScript.
+    """
+    return ''.join(c if c.isascii() and c.isalnum() else '_'
+                   for c in normalizar_texto(termino)[:longitud])
+
+
+def distancia_edicion(a, b):
+    """Distancia de Damerau-Levenshtein (transposiciones adyacentes incluidas)"""
+    anterior2 = None
+    anterior = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        actual = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            coste = 0 if a[i - 1] == b[j - 1] else 1
+            actual[j] = min(anterior[j] + 1, actual[j - 1] + 1, anterior[j - 1] + coste)
+            if (anterior2 is not None and i > 1 and j > 1
+                    and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                actual[j] = min(actual[j], anterior2[j - 2] + 1)
+        anterior2, anterior = anterior, actual
+    return anterior[len(b)]
+
+
+class IndiceDifuso:
+    """
+    Índice de borrados (SymSpell) para buscar la entrada más cercana de un
+    léxico a distancia <= k sin comparar contra todas las entradas
+
+    Cada término del léxico se indexa junto con todas las variantes que
+    resultan de borrarle hasta k letras; una palabra del corpus solo se
+    compara con los términos que comparten alguno de sus propios borrados.
+    Las resoluciones se guardan en caché, así cada palabra distinta del
+    corpus se resuelve una sola vez por proceso.
+    """
+
+    def __init__(self, lexico, distancia_maxima=1, maximo_cache=500000):
+        """
+        Args:
+            lexico (dict): {termino: etiqueta}
+            distancia_maxima (int): Distancia de edición máxima (k)
+            maximo_cache (int): Palabras resueltas que se guardan en caché
+        """
+        self.distancia_maxima = distancia_maxima
+        self.maximo_cache = maximo_cache
+        self.terminos = defaultdict(set)
+        self.borrados = defaultdict(set)
+        self.cache = {}
+
+        for termino, etiqueta in lexico.items():
+            normal = normalizar_texto(termino)
+            self.terminos[normal].add((termino, etiqueta))
+            for borrado in self._generar_borrados(normal):
+                self.borrados[borrado].add(normal)
+
+    def _generar_borrados(self, palabra):
+        """Devuelve la palabra y todas sus variantes con hasta k letras borradas"""
+        variantes = {palabra}
+        frontera = {palabra}
+        for _ in range(self.distancia_maxima):
+            frontera = {p[:i] + p[i + 1:] for p in frontera for i in range(len(p))}
+            variantes |= frontera
+        return variantes
+
+    def buscar(self, palabra):
+        """
+        Resuelve una palabra a su término más cercano del léxico
+
+        Se descartan candidatos con distinta primera o última letra (la
+        última marca el género en español: Juan/Juana, Mario/María) y los
+        empates entre términos distintos.
+
+        Returns:
+            tuple: (termino, etiqueta), o None si no hay un candidato único
+        """
+        if palabra in self.cache:
+            return self.cache[palabra]
+
+        normal = normalizar_texto(palabra)
+        mejores, mejor_distancia = set(), self.distancia_maxima + 1
+        candidatos = set()
+        for borrado in self._generar_borrados(normal):
+            candidatos.update(self._normales(borrado))
+
+        for candidato in candidatos:
+            if candidato[:1] != normal[:1] or candidato[-1:] != normal[-1:]:
+                continue
+            distancia = distancia_edicion(normal, candidato)
+            if distancia < mejor_distancia:
+                mejores, mejor_distancia = set(self._entradas(candidato)), distancia
+            elif distancia == mejor_distancia:
+                mejores.update(self._entradas(candidato))
+
+        resultado = next(iter(mejores)) if len(mejores) == 1 else None
+
+        if len(self.cache) >= self.maximo_cache:
+            self.cache.clear()
+        self.cache[palabra] = resultado
+        return resultado
+
+    def _normales(self, borrado):
+        """Términos normalizados que tienen ese borrado"""
+        return self.borrados.get(borrado, ())
+
+    def _entradas(self, normal):
+        """Pares (termino, etiqueta) de un término normalizado"""
+        return self.terminos[normal]
+
+    def exportar_tablas(self):
+        """
+        Índice en forma de tablas para TablasCompartidas
+
+        Returns:
+            tuple: (etiquetas, {'difuso_lexico': {termino: (etiqueta,)},
+                    'difuso_terminos': {normal: (posición en difuso_lexico,)},
+                    'difuso_borrados': {borrado: (posición en difuso_terminos,)}})
+        """
+        etiquetas = sorted({etiqueta for entradas in self.terminos.values()
+                            for _, etiqueta in entradas})
+        lexico = defaultdict(list)
+        for entradas in self.terminos.values():
+            for termino, etiqueta in entradas:
+                lexico[termino].append(etiquetas.index(etiqueta))
+        posicion_termino = {termino: i for i, termino in enumerate(ordenar_utf8(lexico))}
+        posicion_normal = {normal: i for i, normal in enumerate(ordenar_utf8(self.terminos))}
+        return etiquetas, {
+            'difuso_lexico': lexico,
+            'difuso_terminos': {
+                normal: sorted({posicion_termino[termino] for termino, _ in entradas})
+                for normal, entradas in self.terminos.items()
+            },
+            'difuso_borrados': {
+                borrado: sorted(posicion_normal[normal] for normal in normales)
+                for borrado, normales in self.borrados.items()
+            }
+        }
+
+
+class IndiceDifusoCompartido(IndiceDifuso):
+    """
+    IndiceDifuso de solo lectura sobre las tablas de exportar_tablas()
+    guardadas en TablasCompartidas: los trabajadores del pool consultan
+    el mismo índice sin tener cada uno su copia
+    """
+
+    def __init__(self, tablas, etiquetas, distancia_maxima=1, maximo_cache=500000):
+        self.distancia_maxima = distancia_maxima
+        self.maximo_cache = maximo_cache
+        self.cache = {}
+        self.tablas = tablas
+        self.etiquetas = etiquetas
+
+    def _normales(self, borrado):
+        normales = self.tablas['difuso_terminos']
+        return [normales.clave(i) for i in self.tablas['difuso_borrados'].get(borrado)]
+
+    def _entradas(self, normal):
+        lexico = self.tablas['difuso_lexico']
+        return {(lexico.clave(i), self.etiquetas[e])
+                for i in self.tablas['difuso_terminos'].get(normal)
+                for e in lexico.valores(i)}
+
+
+def ordenar_utf8(claves):
+    """Claves ordenadas por sus bytes UTF-8 (el orden de TablaTerminos)"""
+    return sorted(claves, key=lambda clave: clave.encode('utf-8'))
+
+
+class TablaTerminos(Set):
+    """
+    Diccionario de solo lectura {termino: tupla de enteros} sobre un bloque
+    de bytes, sin objetos Python por entrada
+
+    Las claves se guardan en UTF-8, ordenadas y concatenadas, con un
+    arreglo de desplazamientos; los valores, en un arreglo de enteros
+    de 32 bits. Una consulta es una búsqueda binaria sobre el bloque, que
+    puede ser un archivo mapeado en memoria compartido entre procesos.
+    Se comporta como un conjunto de claves (in, len, iteración, |).
+    """
+
+    def __init__(self, memoria, claves, bytes_claves, valores, origen=None, nombre=None):
+        """
+        Args:
+            memoria (memoryview): Bloque con la tabla (de serializar())
+            claves, bytes_claves, valores (int): Tamaños guardados al serializar
+            origen (TablasCompartidas): Contenedor del bloque (para pickle)
+            nombre (str): Nombre de la tabla en el contenedor
+        """
+        self.origen = origen
+        self.nombre = nombre
+        self.n = claves
+        posicion = 4 * (claves + 1)
+        self._fin_claves = memoria[:posicion].cast('I')
+        self._fin_valores = memoria[posicion:2 * posicion].cast('I')
+        self._claves = memoria[2 * posicion:2 * posicion + bytes_claves]
+        inicio = 2 * posicion + bytes_claves
+        self._valores = memoria[inicio:inicio + 4 * valores].cast('I')
+
+    @staticmethod
+    def serializar(mapa):
+        """
+        Args:
+            mapa (dict): {termino: secuencia de enteros >= 0}
+
+        Returns:
+            tuple: (bloque de bytes, claves, bytes_claves, valores)
+        """
+        claves = sorted((termino.encode('utf-8'), termino) for termino in mapa)
+        fin_claves = array('I', [0])
+        fin_valores = array('I', [0])
+        valores = array('I')
+        for codificada, termino in claves:
+            fin_claves.append(fin_claves[-1] + len(codificada))
+            valores.extend(mapa[termino])
+            fin_valores.append(len(valores))
+        texto = b''.join(codificada for codificada, _ in claves)
+        texto += b'\0' * (-len(texto) % 4)
+        bloque = fin_claves.tobytes() + fin_valores.tobytes() + texto + valores.tobytes()
+        return bloque, len(claves), len(texto), len(valores)
+
+    def __reduce__(self):
+        # Al enviarse a otro proceso se vuelve a abrir el mismo bloque
+        return operator.getitem, (self.origen, self.nombre)
+
+    @classmethod
+    def _from_iterable(cls, elementos):
+        return set(elementos)
+
+    def indice(self, termino):
+        """Posición del término en la tabla, o -1"""
+        if not isinstance(termino, str):
+            return -1
+        buscado = termino.encode('utf-8')
+        inferior, superior = 0, self.n
+        while inferior < superior:
+            medio = (inferior + superior) // 2
+            clave = self._claves[self._fin_claves[medio]:self._fin_claves[medio + 1]].tobytes()
+            if clave < buscado:
+                inferior = medio + 1
+            elif clave > buscado:
+                superior = medio
+            else:
+                return medio
+        return -1
+
+    def clave(self, i):
+        return self._claves[self._fin_claves[i]:self._fin_claves[i + 1]].tobytes().decode('utf-8')
+
+    def valores(self, i):
+        return tuple(self._valores[self._fin_valores[i]:self._fin_valores[i + 1]])
+
+    def get(self, termino, defecto=()):
+        i = self.indice(termino)
+        return defecto if i < 0 else self.valores(i)
+
+    def __contains__(self, termino):
+        return self.indice(termino) >= 0
+
+    def __iter__(self):
+        return (self.clave(i) for i in range(self.n))
+
+    def __len__(self):
+        return self.n
+
+
+class TablasCompartidas:
+    """
+    Varias TablaTerminos en un archivo mapeado en memoria de solo lectura
+
+    El proceso principal escribe el archivo una vez (por defecto en
+    /dev/shm, es decir, en memoria); cada trabajador del pool lo abre con
+    mmap y consulta las tablas sin copiarlas, de modo que todos comparten
+    las mismas páginas físicas. Al enviarse a otro proceso con pickle
+    solo viaja la ruta.
+    """
+
+    CABECERA = b'LXTB'
+
+    def __init__(self, ruta, propietario=False):
+        """
+        Args:
+            ruta (str): Archivo escrito con crear()
+            propietario (bool): Si True, liberar() borra el archivo
+        """
+        self.ruta = ruta
+        self.propietario = propietario
+        with open(ruta, 'rb') as f:
+            self._mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        memoria = memoryview(self._mapa)
+        if memoria[:4] != self.CABECERA:
+            raise ValueError(f"No es un archivo de tablas compartidas: {ruta}")
+        longitud = int.from_bytes(memoria[4:8], 'little')
+        directorio = json.loads(memoria[8:8 + longitud].tobytes())
+        self.tablas = {
+            nombre: TablaTerminos(memoria[inicio:inicio + tamano], claves, bytes_claves,
+                                  valores, origen=self, nombre=nombre)
+            for nombre, (inicio, tamano, claves, bytes_claves, valores) in directorio.items()
+        }
+
+    @classmethod
+    def crear(cls, mapas, ruta=None):
+        """
+        Escribe las tablas en un archivo y lo abre
+
+        Args:
+            mapas (dict): {nombre: {termino: secuencia de enteros}}
+            ruta (str): Archivo de destino (None = temporal, borrado en liberar())
+        """
+        propietario = ruta is None
+        if ruta is None:
+            carpeta = '/dev/shm' if os.path.isdir('/dev/shm') else None
+            descriptor, ruta = tempfile.mkstemp(prefix='lexicos-', suffix='.tab', dir=carpeta)
+            os.close(descriptor)
+
+        bloques = []
+        directorio = {}
+        for nombre, mapa in mapas.items():
+            bloque, claves, bytes_claves, valores = TablaTerminos.serializar(mapa)
+            directorio[nombre] = [bloque, claves, bytes_claves, valores]
+            bloques.append(bloque)
+        # El directorio ocupa lo mismo con posiciones provisionales de igual anchura
+        provisional = {nombre: [10 ** 12, 10 ** 12] + datos[1:]
+                       for nombre, datos in directorio.items()}
+        longitud = len(json.dumps(provisional))
+        inicio = 8 + longitud + (-(8 + longitud) % 8)
+        for nombre, bloque in zip(directorio, bloques):
+            directorio[nombre][:1] = [inicio, len(bloque)]
+            inicio += len(bloque) + (-len(bloque) % 8)
+        indice = json.dumps(directorio).encode('ascii').ljust(longitud)
+
+        with open(ruta, 'wb') as f:
+            f.write(cls.CABECERA + len(indice).to_bytes(4, 'little') + indice)
+            for bloque in bloques:
+                f.write(b'\0' * (-f.tell() % 8))
+                f.write(bloque)
+        return cls(ruta, propietario)
+
+    def __getitem__(self, nombre):
+        return self.tablas[nombre]
+
+    def __reduce__(self):
+        return TablasCompartidas, (self.ruta,)
+
+    def tamano(self):
+        """Bytes del archivo de tablas"""
+        return len(self._mapa)
+
+    def liberar(self):
+        """Borra el archivo temporal (los procesos que lo tengan abierto siguen usándolo)"""
+        if self.propietario and os.path.exists(self.ruta):
+            os.remove(self.ruta)
+
+
+
+class DetectorTerminos:
+    """
+    Detector adicional que se registra en DetectorGeneroMusical
+    (instrumentos, agrupaciones, instituciones...)
+
+    Declara términos por categoría, de una o varias palabras y sin
+    distinguir mayúsculas ("violín", "orquesta sinfónica"), y, si hace
+    falta, expresiones regulares. No recorre el texto: el motor hace una
+    sola pasada por documento para todos los detectores registrados y
+    entrega cada coincidencia a su detector. Para un análisis propio
+    basta heredar y redefinir coincidencia() (o coincidencia_patron()).
+    """
+
+    def __init__(self, seccion, terminos=None, patrones=None):
+        """
+        Args:
+            seccion (str): Clave del resultado en detecciones['adicionales']
+            terminos (dict): {categoria: [términos]}
+            patrones (dict): {categoria: [expresiones regulares]}
+        """
+        for nombre in [seccion, *(terminos or {}), *(patrones or {})]:
+            if not nombre or '/' in nombre:
+                raise ValueError(f"Nombre de sección o categoría no válido: {nombre!r}")
+        self.seccion = seccion
+        self.terminos = {categoria: list(lista) for categoria, lista in (terminos or {}).items()}
+        self.patrones = {categoria: list(lista) for categoria, lista in (patrones or {}).items()}
+
+    def iniciar(self):
+        """Estado vacío para un texto: {categoria: Counter}"""
+        return defaultdict(Counter)
+
+    def coincidencia(self, estado, categoria, termino, posicion, palabras):
+        """
+        Recibe una aparición de un término
+
+        Args:
+            posicion (int): Índice de la primera palabra del término
+            palabras (list): Palabras del texto en minúsculas
+        """
+        estado[categoria][termino] += 1
+
+    def coincidencia_patron(self, estado, categoria, m):
+        """Recibe una coincidencia (re.Match) de una expresión regular"""
+        estado[categoria][m.group(0).lower()] += 1
+
+    def combinar(self, estados):
+        """Suma los estados de los fragmentos de un mismo documento"""
+        combinado = self.iniciar()
+        for estado in estados:
+            for categoria, conteo in estado.items():
+                combinado[categoria].update(conteo)
+        return combinado
+
+    def resultado(self, estado):
+        """Sección del resultado: {categoria: {termino: n}}"""
+        return {categoria: dict(conteo) for categoria, conteo in sorted(estado.items()) if conteo}
+
+
+def detectores_predefinidos():
+    """
+    Detectores adicionales incluidos, por nombre (--detectores)
+
+    Returns:
+        dict: {nombre: DetectorTerminos}
+    """
+    return {
+        'instrumentos': DetectorTerminos('instrumentos', {
+            'cuerda': ['violín', 'viola', 'violonchelo', 'contrabajo', 'guitarra', 'arpa',
+                       'bandurria', 'laúd', 'vihuela'],
+            'tecla': ['piano', 'órgano', 'armonio', 'clave', 'clavicémbalo', 'celesta'],
+            'viento': ['flauta', 'oboe', 'clarinete', 'fagot', 'saxofón', 'trompeta',
+                       'trompa', 'trombón', 'tuba', 'corneta', 'cornetín', 'gaita',
+                       'dulzaina', 'acordeón'],
+            'percusión': ['timbal', 'timbales', 'tambor', 'bombo', 'platillos',
+                          'castañuelas', 'pandereta', 'xilófono']
+        }),
+        'agrupaciones': DetectorTerminos('agrupaciones', {
+            'orquestales': ['orquesta', 'orquesta sinfónica', 'orquesta filarmónica',
+                            'orquesta de cámara', 'banda', 'banda municipal', 'charanga'],
+            'corales': ['coro', 'orfeón', 'masa coral', 'sociedad coral', 'capilla',
+                        'escolanía'],
+            'cámara': ['dúo', 'trío', 'cuarteto', 'quinteto', 'sexteto', 'septeto', 'octeto'],
+            'populares': ['rondalla', 'estudiantina', 'tuna', 'cuadro flamenco', 'comparsa']
+        }),
+        'instituciones': DetectorTerminos('instituciones', {
+            'enseñanza': ['conservatorio', 'real conservatorio', 'escuela de música',
+                          'academia de música', 'schola cantorum'],
+            'teatros': ['teatro real', 'teatro de la zarzuela', 'gran teatro del liceo',
+                        'liceo', 'teatro principal', 'palacio de la música',
+                        'palau de la música'],
+            'sociedades': ['sociedad filarmónica', 'sociedad de conciertos',
+                           'asociación de cultura musical', 'ateneo', 'círculo de bellas artes'],
+            'radio': ['unión radio', 'radio barcelona', 'radio españa', 'emisora']
+        })
+    }
+
+
+def cargar_detectores(valores):
+    """
+    Detectores de --detectores: nombres de detectores_predefinidos() o
+    archivos JSON {"seccion": {"terminos": {...}, "patrones": {...}}}
+
+    Returns:
+        list: DetectorTerminos en el orden indicado
+    """
+    predefinidos = detectores_predefinidos()
+    detectores = []
+    for valor in valores:
+        if valor in predefinidos:
+            detectores.append(predefinidos[valor])
+            continue
+        if not os.path.isfile(valor):
+            raise ValueError(f"Detector desconocido (ni predefinido ni archivo JSON): {valor}")
+        with open(valor, 'r', encoding='utf-8') as f:
+            for seccion, definicion in json.load(f).items():
+                detectores.append(DetectorTerminos(
+                    seccion, definicion.get('terminos'), definicion.get('patrones')))
+    return detectores
+
+
+def alternativa_por_prefijos(palabras):
+    """
+    Alternancia de palabras literales factorizada por prefijos comunes
+
+    Equivale a '(?:palabra1|palabra2|...)' pero el motor de re no prueba
+    cada palabra en cada posición. Cada palabra termina en un grupo vacío,
+    de modo que en una coincidencia m la palabra es orden[m.lastindex - 1].
+
+    Returns:
+        tuple: (patrón, orden)
+    """
+    arbol = {}
+    for palabra in palabras:
+        nodo = arbol
+        for caracter in palabra:
+            nodo = nodo.setdefault(caracter, {})
+        nodo[''] = palabra
+
+    orden = []
+
+    def construir(nodo):
+        alternativas = []
+        for caracter, hijo in sorted(nodo.items()):
+            if caracter == '':
+                orden.append(hijo)
+                alternativas.append('()')
+            else:
+                alternativas.append(re.escape(caracter) + construir(hijo))
+        if len(alternativas) == 1:
+            return alternativas[0]
+        return '(?:' + '|'.join(alternativas) + ')'
+
+    return construir(arbol), orden
+
+
+def celdas_conteo(resultado):
+    """
+    Recorre los conteos por término del resultado de un archivo
+
+    Los tratamientos solo tienen total por género (término '*') y la
+    diversidad no tiene género (''). En los detectores adicionales la
+    sección ocupa el lugar de la categoría y su categoría el del género.
+
+    Yields:
+        tuple: (categoria, genero, termino, n)
+    """
+    detecciones = resultado['detecciones']
+    for genero in ('masculinos', 'femeninos'):
+        for termino, n in detecciones['nombres'][genero].items():
+            yield ('nombres', genero, termino, n)
+        yield ('tratamientos', genero, '*', detecciones['tratamientos'][genero])
+    for genero in ('masculinas', 'femeninas'):
+        for termino, n in detecciones['profesiones'][genero].items():
+            yield ('profesiones', genero, termino, n)
+    for termino, n in detecciones['diversidad'].items():
+        yield ('diversidad', '', termino, n)
+    for seccion, categorias in detecciones.get('adicionales', {}).items():
+        for categoria, conteo in categorias.items():
+            for termino, n in conteo.items():
+                yield (seccion, categoria, termino, n)
+
+
+def cargar_resultados_columnar(ruta, mmap=True):
+    """
+    Reconstruye los resultados (el mismo contenido que el JSON, con el mismo
+    orden de claves) a partir de una exportación de
+    DetectorGeneroMusical.exportar_columnar()
+
+    Para trabajar solo con la matriz basta con
+    np.load(os.path.join(ruta, 'conteos.npy'), mmap_mode='r').
+
+    Args:
+        ruta (str): Directorio o archivo .npz exportado
+        mmap (bool): Abrir los .npy sin copiarlos en memoria
+
+    Returns:
+        dict: Resultados con la misma estructura que self.resultados
+    """
+    if np is None:
+        raise ImportError("La exportación columnar necesita NumPy (pip install numpy)")
+
+    nombres = ('conteos', 'vocabulario', 'archivos', 'rutas', 'palabras',
+               'menciones_masculinas', 'menciones_femeninas', 'ratio_sesgo',
+               'celdas', 'inicio_celdas')
+    if ruta.endswith('.npz'):
+        datos = np.load(ruta)
+        columnas = {nombre: datos[nombre] for nombre in nombres}
+        resultados = json.loads(datos['resto'].tobytes().decode('utf-8'))
+    else:
+        columnas = {nombre: np.load(os.path.join(ruta, nombre + '.npy'),
+                                    mmap_mode='r' if mmap else None)
+                    for nombre in nombres}
+        with open(os.path.join(ruta, 'resto.json'), 'r', encoding='utf-8') as f:
+            resultados = json.load(f)
+
+    vocabulario = [str(clave).split('/', 2) for clave in columnas['vocabulario']]
+    for i, archivo in enumerate(resultados['archivos']):
+        archivo['archivo'] = str(columnas['archivos'][i])
+        archivo['ruta'] = str(columnas['rutas'][i])
+        archivo['palabras'] = int(columnas['palabras'][i])
+
+        detecciones = archivo['detecciones']
+        detecciones['nombres']['masculinos'] = {}
+        detecciones['nombres']['femeninos'] = {}
+        detecciones['tratamientos'] = {'masculinos': 0, 'femeninos': 0}
+        detecciones['profesiones']['masculinas'] = {}
+        detecciones['profesiones']['femeninas'] = {}
+        detecciones['diversidad'] = {}
+        adicionales = detecciones.get('adicionales', {})
+        for seccion in adicionales:
+            adicionales[seccion] = {}
+
+        fila = columnas['conteos'][i]
+        celdas = columnas['celdas'][columnas['inicio_celdas'][i]:columnas['inicio_celdas'][i + 1]]
+        for j in celdas.tolist():
+            categoria, genero, termino = vocabulario[j]
+            n = int(fila[j])
+            if categoria == 'tratamientos':
+                detecciones['tratamientos'][genero] = n
+            elif categoria == 'diversidad':
+                detecciones['diversidad'][termino] = n
+            elif categoria in adicionales:
+                adicionales[categoria].setdefault(genero, {})[termino] = n
+            else:
+                detecciones[categoria][genero][termino] = n
+
+        archivo['totales'] = {
+            'menciones_masculinas': int(columnas['menciones_masculinas'][i]),
+            'menciones_femeninas': int(columnas['menciones_femeninas'][i]),
+            'ratio_sesgo': float(columnas['ratio_sesgo'][i])
+        }
+
+    return resultados
+
+
+def intervalo_bootstrap(masculinas, femeninas, pesos=None, remuestreos=2000, confianza=0.95,
+                        semilla=None, elementos_bloque=1 << 22, estratos=None, poblacion=None):
+    """
+    Intervalo de confianza bootstrap del ratio de sesgo remuestreando archivos
+
+    Cada remuestreo elige n archivos con reemplazo y suma sus menciones.
+    Todos los remuestreos se calculan como matrices de índices
+    (remuestreos × archivos), por bloques de elementos_bloque para no
+    agotar la memoria en corpus grandes. Los percentiles se toman sobre la
+    proporción femenina, que está acotada, y se convierten a ratio (un
+    remuestreo sin menciones femeninas da un ratio infinito).
+
+    Args:
+        masculinas, femeninas: Menciones de cada archivo
+        pesos: Peso de cada archivo (p. ej. 1 + copias de un duplicado)
+        semilla (int): Semilla del generador (None = aleatoria)
+        estratos: Estrato de cada archivo; si se indica, cada remuestreo
+                  elige dentro de cada estrato tantos archivos como tiene
+        poblacion (dict): Archivos N_h de cada estrato en el corpus cuando
+                  los archivos son una muestra sin reemplazo. La
+                  desviación de cada estrato se multiplica por la
+                  corrección de población finita sqrt((N_h-n_h)/(N_h-1)),
+                  así el intervalo se anula si se ha leído todo
+
+    Returns:
+        dict: {'ratio_sesgo': [inferior, superior],
+               'porcentaje_femenino': [inferior, superior], 'confianza',
+               'remuestreos', 'semilla'}, o None sin NumPy, sin archivos
+               o sin menciones
+    """
+    if np is None or len(masculinas) == 0 or remuestreos <= 0:
+        return None
+
+    masculinas = np.asarray(masculinas, dtype=np.float64)
+    femeninas = np.asarray(femeninas, dtype=np.float64)
+    if pesos is not None:
+        pesos = np.asarray(pesos, dtype=np.float64)
+        masculinas = masculinas * pesos
+        femeninas = femeninas * pesos
+    if not (masculinas.sum() + femeninas.sum()):
+        return None
+
+    n = len(masculinas)
+    rng = np.random.default_rng(semilla)
+    grupos = None
+    if estratos is not None:
+        claves, codigos = np.unique(np.asarray(estratos), return_inverse=True)
+        grupos = [np.flatnonzero(codigos == c) for c in range(len(claves))]
+        correcciones = []
+        for clave, grupo in zip(claves.tolist(), grupos):
+            total_estrato = poblacion.get(clave, len(grupo)) if poblacion else None
+            if total_estrato is None:
+                correcciones.append(1.0)
+            elif total_estrato > 1:
+                correcciones.append(max(0.0, (total_estrato - len(grupo))
+                                        / (total_estrato - 1)) ** 0.5)
+            else:
+                correcciones.append(0.0)
+    proporciones = np.empty(remuestreos)
+    filas = max(1, elementos_bloque // n)
+    for inicio in range(0, remuestreos, filas):
+        fin = min(inicio + filas, remuestreos)
+        if grupos is None:
+            indices = rng.integers(0, n, size=(fin - inicio, n))
+            total_femenino = femeninas[indices].sum(axis=1)
+            total = masculinas[indices].sum(axis=1) + total_femenino
+        else:
+            # Cada estrato aporta su total observado más la desviación del
+            # remuestreo, reducida por la corrección de población finita
+            total_femenino = np.zeros(fin - inicio)
+            total = np.zeros(fin - inicio)
+            for grupo, correccion in zip(grupos, correcciones):
+                indices = grupo[rng.integers(0, len(grupo), size=(fin - inicio, len(grupo)))]
+                fem_observado = femeninas[grupo].sum()
+                masc_observado = masculinas[grupo].sum()
+                fem = fem_observado + correccion * (femeninas[indices].sum(axis=1) - fem_observado)
+                masc = masc_observado + correccion * (
+                    masculinas[indices].sum(axis=1) - masc_observado)
+                total_femenino += fem
+                total += masc + fem
+        with np.errstate(invalid='ignore'):
+            proporciones[inicio:fin] = total_femenino / total
+
+    alfa = (1 - confianza) / 2
+    inferior, superior = (float(p) for p in
+                          np.nanpercentile(proporciones, [100 * alfa, 100 * (1 - alfa)]))
+
+    def ratio(proporcion):
+        return float('inf') if proporcion == 0 else round((1 - proporcion) / proporcion, 2)
+
+    return {
+        'ratio_sesgo': [ratio(superior), ratio(inferior)],
+        'porcentaje_femenino': [round(100 * inferior, 2), round(100 * superior, 2)],
+        'confianza': confianza,
+        'remuestreos': remuestreos,
+        'semilla': semilla
+    }
+
+
+def formatear_intervalo(intervalo):
+    """Texto de un intervalo de intervalo_bootstrap(), p. ej. "IC 95%: 3.1–5.2:1" """
+    if not intervalo:
+        return ''
+    inferior, superior = ('∞' if r == float('inf') else r for r in intervalo['ratio_sesgo'])
+    return f"IC {intervalo['confianza']:.0%}: {inferior}–{superior}:1"
+
+
+def _hash64(texto, semilla=0):
+    """Hash estable de 64 bits (igual en todos los procesos y ejecuciones)"""
+    digest = hashlib.blake2b(texto.encode('utf-8'), digest_size=8,
+                             salt=semilla.to_bytes(8, 'little')).digest()
+    return int.from_bytes(digest, 'little')
+
+
+class CountMinSketch:
+    """
+    Conteo aproximado de frecuencias en memoria fija (Count-Min)
+
+    La estimación nunca es menor que la frecuencia real y la supera como
+    mucho en un pequeño porcentaje del total de elementos añadidos.
+    """
+
+    def __init__(self, anchura=1 << 16, profundidad=4):
+        self.anchura = anchura
+        self.profundidad = profundidad
+        self.tablas = [array('L', [0]) * anchura for _ in range(profundidad)]
+        self.total = 0
+
+    def _columnas(self, elemento):
+        h = _hash64(elemento)
+        h1, h2 = h & 0xFFFFFFFF, h >> 32
+        return [(h1 + fila * h2) % self.anchura for fila in range(self.profundidad)]
+
+    def agregar(self, elemento, cantidad=1):
+        for tabla, columna in zip(self.tablas, self._columnas(elemento)):
+            tabla[columna] += cantidad
+        self.total += cantidad
+
+    def estimar(self, elemento):
+        return min(tabla[columna]
+                   for tabla, columna in zip(self.tablas, self._columnas(elemento)))
+
+
+class HyperLogLog:
+    """Estimación del número de elementos distintos en memoria fija"""
+
+    def __init__(self, precision=14):
+        self.precision = precision
+        self.m = 1 << precision
+        self.registros = bytearray(self.m)
+
+    def agregar(self, elemento):
+        h = _hash64(elemento, semilla=1)
+        indice = h >> (64 - self.precision)
+        resto = h & ((1 << (64 - self.precision)) - 1)
+        rango = (64 - self.precision) - resto.bit_length() + 1
+        if rango > self.registros[indice]:
+            self.registros[indice] = rango
+
+    def estimar(self):
+        alfa = 0.7213 / (1 + 1.079 / self.m)
+        estimacion = alfa * self.m * self.m / sum(2.0 ** -r for r in self.registros)
+        vacios = self.registros.count(0)
+        if estimacion <= 2.5 * self.m and vacios:
+            estimacion = self.m * math.log(self.m / vacios)
+        return int(round(estimacion))
+
+
+class FrecuentesMisraGries:
+    """
+    Lista de elementos más frecuentes con k contadores (Misra-Gries)
+
+    Conserva todo elemento cuya frecuencia supere total / (k + 1); los
+    contadores pueden quedarse cortos, por eso las frecuencias se
+    estiman con un CountMinSketch.
+    """
+
+    def __init__(self, k=2000):
+        self.k = k
+        self.contadores = {}
+
+    def agregar(self, elemento):
+        if elemento in self.contadores:
+            self.contadores[elemento] += 1
+        elif len(self.contadores) < self.k:
+            self.contadores[elemento] = 1
+        else:
+            for clave in list(self.contadores):
+                self.contadores[clave] -= 1
+                if self.contadores[clave] == 0:
+                    del self.contadores[clave]
+
+    def candidatos(self):
+        return list(self.contadores)
+
+
+class AlmacenSQLite:
+    """
+    Almacén de resultados en SQLite con varias ejecuciones consultables
+
+    Tablas: ejecuciones (una fila por ejecución), archivos (totales por
+    archivo) y conteos (una fila por archivo, categoría, género y
+    término). Los archivos se escriben por lotes, en una transacción por
+    lote, a medida que llegan los resultados.
+    """
+
+    ESQUEMA = """
+        CREATE TABLE IF NOT EXISTS ejecuciones (
+            id INTEGER PRIMARY KEY,
+            fecha TEXT,
+            directorio TEXT,
+            parametros TEXT,
+            total_archivos INTEGER,
+            total_palabras INTEGER,
+            menciones_masculinas REAL,
+            menciones_femeninas REAL,
+            ratio_sesgo REAL
+        );
+        CREATE TABLE IF NOT EXISTS archivos (
+            id INTEGER PRIMARY KEY,
+            ejecucion_id INTEGER NOT NULL REFERENCES ejecuciones(id),
+            ruta TEXT NOT NULL,
+            archivo TEXT,
+            palabras INTEGER,
+            menciones_masculinas INTEGER,
+            menciones_femeninas INTEGER,
+            ratio_sesgo REAL,
+            UNIQUE (ejecucion_id, ruta)
+        );
+        CREATE TABLE IF NOT EXISTS conteos (
+            archivo_id INTEGER NOT NULL REFERENCES archivos(id),
+            categoria TEXT NOT NULL,
+            genero TEXT NOT NULL,
+            termino TEXT NOT NULL,
+            n INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_conteos_archivo ON conteos (archivo_id);
+        CREATE INDEX IF NOT EXISTS idx_conteos_termino ON conteos (termino, categoria, genero);
+    """
+
+    def __init__(self, ruta_db, tamano_lote=500):
+        """
+        Args:
+            ruta_db (str): Archivo SQLite (se crea si no existe)
+            tamano_lote (int): Archivos por transacción
+        """
+        self.ruta_db = ruta_db
+        self.tamano_lote = tamano_lote
+        self.conexion = sqlite3.connect(ruta_db)
+        self.conexion.executescript(self.ESQUEMA)
+        self.ejecucion_id = None
+        self.pendientes = []
+
+    def iniciar_ejecucion(self, directorio, parametros=None):
+        """Registra una nueva ejecución y devuelve su id"""
+        with self.conexion:
+            cursor = self.conexion.execute(
+                "INSERT INTO ejecuciones (fecha, directorio, parametros) VALUES (?, ?, ?)",
+                (datetime.now().isoformat(), directorio,
+                 json.dumps(parametros or {}, ensure_ascii=False)))
+        self.ejecucion_id = cursor.lastrowid
+        self.pendientes = []
+        return self.ejecucion_id
+
+    def agregar_resultado(self, resultado):
+        """Encola el resultado de un archivo y escribe el lote si está lleno"""
+        self.pendientes.append(resultado)
+        if len(self.pendientes) >= self.tamano_lote:
+            self.escribir_lote()
+
+    def escribir_lote(self):
+        """Escribe los resultados pendientes en una sola transacción"""
+        if not self.pendientes:
+            return
+        with self.conexion:
+            for resultado in self.pendientes:
+                totales = resultado['totales']
+                cursor = self.conexion.execute(
+                    "INSERT INTO archivos (ejecucion_id, ruta, archivo, palabras, "
+                    "menciones_masculinas, menciones_femeninas, ratio_sesgo) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (self.ejecucion_id, resultado['ruta'], resultado['archivo'],
+                     resultado['palabras'], totales['menciones_masculinas'],
+                     totales['menciones_femeninas'], totales['ratio_sesgo']))
+                self.conexion.executemany(
+                    "INSERT INTO conteos (archivo_id, categoria, genero, termino, n) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    [(cursor.lastrowid,) + fila for fila in celdas_conteo(resultado)])
+        self.pendientes = []
+
+    def finalizar_ejecucion(self, resultados):
+        """Escribe lo pendiente y guarda los totales de la ejecución"""
+        self.escribir_lote()
+        meta = resultados['metadata']
+        resumen = resultados['resumen_general']
+        with self.conexion:
+            self.conexion.execute(
+                "UPDATE ejecuciones SET total_archivos = ?, total_palabras = ?, "
+                "menciones_masculinas = ?, menciones_femeninas = ?, ratio_sesgo = ? "
+                "WHERE id = ?",
+                (meta['total_archivos'], meta['total_palabras'],
+                 resumen['menciones_masculinas_total'], resumen['menciones_femeninas_total'],
+                 resumen['ratio_sesgo_general'], self.ejecucion_id))
+
+    def comparar(self, ejecucion_a, ejecucion_b, maximo=20):
+        """
+        Compara dos ejecuciones (p. ej. con léxicos distintos)
+
+        Returns:
+            dict: Archivos nuevos/eliminados/cambiados y términos cuyo
+                  conteo total ha cambiado, ordenados por la diferencia
+        """
+        consulta = self.conexion.execute
+        for ejecucion in (ejecucion_a, ejecucion_b):
+            if consulta("SELECT 1 FROM ejecuciones WHERE id = ?", (ejecucion,)).fetchone() is None:
+                raise ValueError(f"No existe la ejecución {ejecucion} en {self.ruta_db}")
+
+        solo = ("SELECT ruta FROM archivos WHERE ejecucion_id = ? AND ruta NOT IN "
+                "(SELECT ruta FROM archivos WHERE ejecucion_id = ?) ORDER BY ruta")
+        eliminados = [fila[0] for fila in consulta(solo, (ejecucion_a, ejecucion_b))]
+        nuevos = [fila[0] for fila in consulta(solo, (ejecucion_b, ejecucion_a))]
+
+        cambiados = [
+            {'ruta': ruta, 'masculinas': [ma, mb], 'femeninas': [fa, fb]}
+            for ruta, ma, mb, fa, fb in consulta(
+                "SELECT a.ruta, a.menciones_masculinas, b.menciones_masculinas, "
+                "a.menciones_femeninas, b.menciones_femeninas "
+                "FROM archivos a JOIN archivos b ON a.ruta = b.ruta "
+                "WHERE a.ejecucion_id = ? AND b.ejecucion_id = ? "
+                "AND (a.menciones_masculinas != b.menciones_masculinas "
+                "OR a.menciones_femeninas != b.menciones_femeninas) "
+                "ORDER BY ABS(b.menciones_masculinas - a.menciones_masculinas) "
+                "+ ABS(b.menciones_femeninas - a.menciones_femeninas) DESC",
+                (ejecucion_a, ejecucion_b))
+        ]
+
+        terminos = [
+            {'categoria': categoria, 'genero': genero, 'termino': termino,
+             'antes': antes, 'despues': despues, 'diferencia': despues - antes}
+            for categoria, genero, termino, antes, despues in consulta(
+                "SELECT c.categoria, c.genero, c.termino, "
+                "SUM(CASE WHEN a.ejecucion_id = ? THEN c.n ELSE 0 END) AS antes, "
+                "SUM(CASE WHEN a.ejecucion_id = ? THEN c.n ELSE 0 END) AS despues "
+                "FROM conteos c JOIN archivos a ON a.id = c.archivo_id "
+                "WHERE a.ejecucion_id IN (?, ?) "
+                "GROUP BY c.categoria, c.genero, c.termino "
+                "HAVING antes != despues "
+                "ORDER BY ABS(despues - antes) DESC",
+                (ejecucion_a, ejecucion_b, ejecucion_a, ejecucion_b))
+        ]
+
+        return {
+            'ejecucion_a': ejecucion_a,
+            'ejecucion_b': ejecucion_b,
+            'archivos_eliminados': eliminados,
+            'archivos_nuevos': nuevos,
+            'total_archivos_cambiados': len(cambiados),
+            'archivos_cambiados': cambiados[:maximo],
+            'total_terminos_cambiados': len(terminos),
+            'terminos_cambiados': terminos[:maximo]
+        }
+
+    def cerrar(self):
+        self.escribir_lote()
+        self.conexion.close()
+
+
+class ReporteProgreso:
+    """
+    Progreso de un análisis con coste mínimo por archivo
+
+    Las líneas de progreso se limitan a una cada `intervalo` segundos (en
+    una terminal se reescribe la misma línea; en un log se usa un
+    intervalo mayor). Opcionalmente reescribe cada `intervalo_metricas`
+    segundos un archivo de métricas en formato de texto de Prometheus.
+    """
+
+    def __init__(self, total_archivos, total_bytes, silencioso=False, intervalo=0.25,
+                 ruta_metricas=None, intervalo_metricas=5.0):
+        self.total_archivos = total_archivos
+        self.total_bytes = total_bytes
+        self.silencioso = silencioso
+        self.terminal = sys.stdout.isatty()
+        self.intervalo = intervalo if self.terminal else max(intervalo, 10.0)
+        self.ruta_metricas = ruta_metricas
+        self.intervalo_metricas = intervalo_metricas
+
+        self.archivos = 0
+        self.bytes = 0
+        self.errores = 0
+        self.menciones = Counter()
+        self.segundos_etapas = Counter()
+        self.inicio = time.perf_counter()
+        self.ultima_linea = 0.0
+        self.ultimas_metricas = 0.0
+
+    def actualizar(self, archivos=0, bytes_leidos=0, errores=0, menciones=None,
+                   segundos_etapas=None):
+        """Acumula contadores y, si ha pasado el intervalo, informa"""
+        self.archivos += archivos
+        self.bytes += bytes_leidos
+        self.errores += errores
+        if menciones:
+            self.menciones.update(menciones)
+        if segundos_etapas:
+            self.segundos_etapas.update(segundos_etapas)
+
+        ahora = time.perf_counter()
+        if not self.silencioso and ahora - self.ultima_linea >= self.intervalo:
+            self.ultima_linea = ahora
+            self._imprimir(ahora)
+        if self.ruta_metricas and ahora - self.ultimas_metricas >= self.intervalo_metricas:
+            self.ultimas_metricas = ahora
+            self.escribir_metricas()
+
+    def _imprimir(self, ahora, final=False):
+        transcurrido = max(ahora - self.inicio, 1e-9)
+        velocidad = self.archivos / transcurrido
+        mb_s = self.bytes / transcurrido / 1e6
+        if self.bytes and self.total_bytes > self.bytes:
+            restante = f"{(self.total_bytes - self.bytes) / (self.bytes / transcurrido):.0f} s"
+        else:
+            restante = "0 s" if final else "?"
+        linea = (f"⚙️  {self.archivos}/{self.total_archivos} archivos | "
+                 f"{velocidad:.1f} arch/s | {mb_s:.2f} MB/s | "
+                 f"ETA {restante} | errores: {self.errores}")
+        if self.terminal:
+            print('\r' + linea, end='\n' if final else '', flush=True)
+        else:
+            print(linea, flush=True)
+
+    def finalizar(self):
+        """Última línea de progreso y última escritura de métricas"""
+        if not self.silencioso:
+            self._imprimir(time.perf_counter(), final=True)
+        if self.ruta_metricas:
+            self.escribir_metricas()
+
+    def escribir_metricas(self):
+        """Reescribe (de forma atómica) el archivo de métricas Prometheus"""
+        metricas = [
+            ('detector_archivos_previstos', 'gauge',
+             "Archivos a analizar en esta ejecución", [('', self.total_archivos)]),
+            ('detector_archivos_procesados_total', 'counter',
+             "Archivos analizados (incluidos los fallidos)", [('', self.archivos)]),
+            ('detector_bytes_procesados_total', 'counter',
+             "Bytes de texto analizados", [('', self.bytes)]),
+            ('detector_errores_total', 'counter',
+             "Archivos con errores o en cuarentena", [('', self.errores)]),
+            ('detector_menciones_total', 'counter',
+             "Menciones detectadas por género",
+             [(f'{{genero="{genero}"}}', n) for genero, n in sorted(self.menciones.items())]),
+            ('detector_etapa_segundos_total', 'counter',
+             "Tiempo acumulado de cada etapa de detección",
+             [(f'{{etapa="{etapa}"}}', round(s, 6))
+              for etapa, s in sorted(self.segundos_etapas.items())]),
+            ('detector_transcurrido_segundos', 'gauge',
+             "Tiempo desde el inicio de la ejecución",
+             [('', round(time.perf_counter() - self.inicio, 3))])
+        ]
+
+        lineas = []
+        for nombre, tipo, ayuda, muestras in metricas:
+            lineas.append(f"# HELP {nombre} {ayuda}")
+            lineas.append(f"# TYPE {nombre} {tipo}")
+            lineas.extend(f"{nombre}{etiquetas} {valor}" for etiquetas, valor in muestras)
+
+        temporal = self.ruta_metricas + '.tmp'
+        with open(temporal, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lineas) + '\n')
+        os.replace(temporal, self.ruta_metricas)
+
+
+class PresupuestoExcedido(Exception):
+    """Un archivo ha superado su límite de tiempo, bytes o coincidencias"""
+
+    def __init__(self, motivo, etapa, detalle=''):
+        mensaje = f"límite de {motivo} superado en la etapa '{etapa}'"
+        super().__init__(mensaje + (f" ({detalle})" if detalle else ''))
+        self.motivo = motivo
+        self.etapa = etapa
+
+
 class DetectorGeneroMusical:
+    MOTORES = ('referencia', 'combinado')
+
     def __init__(self, base_directory):
         """
         Inicializa el detector de género
@@ -132,11 +1269,199 @@ class DetectorGeneroMusical:
             'hispano', 'hispana', 'mestizo', 'mestiza'
         ]
 
-    # =====================================================================
-    # MÉTODOS DE DETECCIÓN
-    # =====================================================================
+        # =================================================================
+        # PLANIFICACIÓN DE TAREAS (ejecución en paralelo)
+        # =================================================================
 
-    def detectar_nombres_personas(self, contenido):
+        # Tamaño mínimo de cada fragmento al dividir archivos muy grandes
+        self.bytes_minimos_fragmento = 1 << 20
+        # Máximo de archivos pequeños agrupados en una misma tarea
+        self.archivos_maximos_lote = 64
+        # Si True, los trabajadores consultan los léxicos de nombres y el
+        # índice aproximado en un archivo mapeado en memoria compartido,
+        # en lugar de recibir cada uno su propia copia
+        self.compartir_lexicos = False
+        # Archivo de las tablas compartidas (None = temporal en /dev/shm)
+        self.ruta_tablas_compartidas = None
+        self._tablas_compartidas = None
+
+        # =================================================================
+        # DUPLICADOS APROXIMADOS (reimpresiones entre números)
+        # =================================================================
+
+        # Si True, solo se analiza un representante por grupo de duplicados
+        self.detectar_duplicados = False
+        # Similitud de Jaccard mínima para considerar dos documentos duplicados
+        self.umbral_duplicados = 0.8
+        # Peso de cada duplicado en el resumen general (1 = contar, 0 = excluir)
+        self.peso_duplicados = 1.0
+        # Parámetros de la huella MinHash y de las bandas LSH
+        self.palabras_por_shingle = 5
+        self.bins_minhash = 64
+        self.bandas_lsh = 16
+
+        # =================================================================
+        # BÚSQUEDA APROXIMADA DE NOMBRES (errores de OCR)
+        # =================================================================
+
+        # Si True, se cuentan también variantes cercanas de los nombres
+        self.coincidencia_difusa = False
+        # Distancia de edición máxima entre la variante y el nombre
+        self.distancia_difusa = 1
+        # Longitud mínima de las palabras que se buscan de forma aproximada
+        # con distancia 1; cada punto más de distancia exige 2 letras más.
+        # Las más cortas solo se aceptan si difieren únicamente en tildes
+        self.longitud_minima_difusa = 6
+        # Palabras comunes y otros nombres de pila que están a un error de
+        # un nombre del léxico y no deben contarse como variantes
+        self.palabras_no_difusas = {
+            # Palabras comunes
+            'razón', 'carmín', 'manual', 'pausa', 'rosca', 'sandía', 'salvia',
+            'sacra', 'mareo', 'andes',
+            # Otros nombres de pila y apellidos
+            'marco', 'marino', 'marina', 'antonino', 'lucila', 'sonia', 'martha',
+            'silva'
+        }
+        self._indice_difuso = None
+
+        # =================================================================
+        # COOCURRENCIA NOMBRE-PROFESIÓN
+        # =================================================================
+
+        # Si True, se relaciona cada persona con las profesiones cercanas
+        self.analizar_coocurrencias = False
+        # Distancia máxima (en palabras) entre la persona y la profesión
+        self.ventana_coocurrencia = 5
+        self._tablas_coocurrencia = None
+
+        # =================================================================
+        # LÍMITES POR ARCHIVO (None = sin límite)
+        # =================================================================
+
+        self.limite_segundos_archivo = None
+        self.limite_bytes_archivo = None
+        self.limite_coincidencias_archivo = None
+        # Si True, los archivos en cuarentena se reintentan por fragmentos
+        self.reintentar_por_fragmentos = False
+        # Los fragmentos que vuelven a fallar se dividen por la mitad hasta
+        # este tamaño; por debajo se descartan
+        self.bytes_minimos_reintento = 1 << 16
+        # Archivos en cuarentena o con errores (motivo y etapa)
+        self.problemas = []
+        self._presupuesto = None
+        self._etapa_actual = None
+
+        # =================================================================
+        # PROGRESO Y MÉTRICAS
+        # =================================================================
+
+        # Si True, no se muestran líneas de progreso
+        self.silencioso = False
+        # Segundos mínimos entre dos líneas de progreso (en una terminal)
+        self.intervalo_progreso = 0.25
+        # Archivo de métricas Prometheus que se reescribe periódicamente
+        self.ruta_metricas = None
+        # Tiempo acumulado por etapa de detección (en este proceso)
+        self.segundos_etapas = Counter()
+
+        # =================================================================
+        # MOTOR DE DETECCIÓN
+        # =================================================================
+
+        # 'referencia': una expresión regular por término (implementación
+        # original); 'combinado': una búsqueda por categoría, con los mismos
+        # conteos (comprobable con el modo verificar)
+        self.motor_deteccion = 'referencia'
+        self._motor_combinado = None
+        self._terminos_combinados = None
+
+        # =================================================================
+        # SEGMENTACIÓN EN ARTÍCULOS O SECCIONES
+        # =================================================================
+
+        # Si True, cada archivo se analiza por segmentos (con resumen de cada uno)
+        self.segmentar = False
+        # Líneas vacías seguidas que separan dos segmentos
+        self.lineas_vacias_segmento = 2
+        # Longitud máxima de una línea de título (y del título guardado)
+        self.longitud_maxima_titulo = 60
+        # Línea que abre una sección
+        self.marcador_seccion = r'\s*secci[óo]n\b'
+
+        # =================================================================
+        # INTERVALOS DE CONFIANZA (bootstrap sobre archivos, requiere NumPy)
+        # =================================================================
+
+        # Remuestreos del bootstrap (0 = sin intervalos)
+        self.remuestreos_bootstrap = 2000
+        # Nivel de confianza de los intervalos
+        self.confianza_bootstrap = 0.95
+        # Semilla del generador (None = aleatoria, se guarda en el JSON)
+        self.semilla_bootstrap = None
+
+        # =================================================================
+        # ESTIMACIÓN RÁPIDA POR MUESTREO (estimar_directorio)
+        # =================================================================
+
+        # Estratos de la muestra: 'publicacion', 'anio' o 'tamano' (cuartiles)
+        self.estratos_muestra = 'publicacion'
+        # Archivos del primer lote y mínimo antes de poder parar
+        self.archivos_minimos_muestra = 30
+        # Cada lote siguiente lee esta fracción de lo ya leído
+        self.crecimiento_muestra = 0.25
+
+        # =================================================================
+        # DESAMBIGUACIÓN DE PROFESIONES DE DOBLE GÉNERO
+        # =================================================================
+
+        # Si True, "pianista", "cantante"... cuentan para un solo género
+        # según el contexto, en lugar de para los dos
+        self.desambiguar_profesiones = False
+        # Adjetivos hacia atrás que se saltan buscando el determinante (las
+        # palabras de enlace, como "y" o "muy", no cuentan)
+        self.ventana_desambiguacion = 3
+
+        # Determinantes y adjetivos que fijan el género de lo que sigue
+        self.contexto_masculino = {
+            'el', 'un', 'del', 'al', 'este', 'ese', 'aquel', 'otro', 'mismo',
+            'nuestro', 'vuestro', 'dicho', 'citado', 'mencionado', 'famoso',
+            'conocido', 'distinguido', 'aplaudido', 'reputado', 'admirado',
+            'aclamado', 'afamado', 'renombrado', 'buen', 'primer', 'nuevo',
+            'eximio', 'señor', 'don'
+        }
+        self.contexto_femenino = {
+            'la', 'una', 'esta', 'esa', 'aquella', 'otra', 'misma',
+            'nuestra', 'vuestra', 'dicha', 'citada', 'mencionada', 'famosa',
+            'conocida', 'distinguida', 'aplaudida', 'reputada', 'admirada',
+            'aclamada', 'afamada', 'renombrada', 'buena', 'primera', 'nueva',
+            'eximia', 'señora', 'señorita', 'doña'
+        }
+        # Adjetivos invariables y posesivos que se saltan ("el célebre violinista")
+        self.adjetivos_invariables = {
+            'célebre', 'gran', 'joven', 'notable', 'eminente', 'ilustre',
+            'insigne', 'excelente', 'genial', 'admirable', 'popular',
+            'inolvidable', 'mejor', 'brillante', 'formidable', 'incomparable',
+            'su', 'sus'
+        }
+        # Conjunciones y adverbios entre los adjetivos ("la joven y brillante
+        # pianista", "el muy aplaudido tenor"), que también se saltan
+        self.palabras_enlace = {'y', 'e', 'ni', 'muy', 'tan', 'más', 'también'}
+        self._tabla_contexto = None
+
+        # =================================================================
+        # DETECTORES ADICIONALES (instrumentos, agrupaciones...)
+        # =================================================================
+
+        # DetectorTerminos registrados con registrar_detector(); todos se
+        # resuelven en una sola pasada por documento
+        self.detectores_registrados = []
+        self._motor_registrados = None
+
+    # =====================================================================
+    # MÉTODOS DE DETECCIÓN
+    # =====================================================================
+
+    def detectar_nombres_personas(self, contenido):
         """
         Detecta nombres propios en el texto usando contexto
 
@@ -159,6 +1484,7 @@ class DetectorGeneroMusical:
             # Patrón: nombre con mayúscula seguido de apellido o contexto
             patron = r'\b' + nombre.capitalize() + r'\b(?:\s+[A-ZÁÉÍÓÚÑ][a-záéíóúñ]+)?'
             matches = list(re.finditer(patron, contenido, re.IGNORECASE))
+            self._comprobar_presupuesto(len(matches))
             if len(matches) > 0:
                 nombres_detectados['masculinos'][nombre] = len(matches)
                 # Guardar ejemplos de nombres completos (máximo 3)
@@ -169,14 +1495,73 @@ class DetectorGeneroMusical:
         for nombre in self.nombres_femeninos:
             patron = r'\b' + nombre.capitalize() + r'\b(?:\s+[A-ZÁÉÍÓÚÑ][a-záéíóúñ]+)?'
             matches = list(re.finditer(patron, contenido, re.IGNORECASE))
+            self._comprobar_presupuesto(len(matches))
             if len(matches) > 0:
                 nombres_detectados['femeninos'][nombre] = len(matches)
                 # Guardar ejemplos de nombres completos (máximo 3)
                 ejemplos = list(set([m.group(0).strip() for m in matches[:5]]))[:3]
                 nombres_detectados['ejemplos_femeninos'][nombre] = ejemplos
 
+        # Variantes con errores de OCR (búsqueda aproximada, opcional)
+        if self.coincidencia_difusa:
+            self._detectar_nombres_difusos(contenido, nombres_detectados)
+
         return nombres_detectados
 
+    def obtener_indice_difuso(self):
+        """
+        Construye (una vez por proceso) el índice aproximado de nombres
+
+        Si se modifican los léxicos después de usarlo, asignar
+        self._indice_difuso = None para reconstruirlo.
+        """
+        if self._indice_difuso is None:
+            lexico = {nombre: 'masculinos' for nombre in self.nombres_masculinos}
+            lexico.update({nombre: 'femeninos' for nombre in self.nombres_femeninos})
+            self._indice_difuso = IndiceDifuso(lexico, self.distancia_difusa)
+        return self._indice_difuso
+
+    def _detectar_nombres_difusos(self, contenido, nombres_detectados):
+        """
+        Añade a nombres_detectados las variantes OCR de nombres del léxico
+        ("Marìa", "Joaqnín", "Concepcion") que la búsqueda exacta no cuenta
+
+        Se descartan las palabras que el documento también escribe en
+        minúscula ("Razón" a principio de frase y "razón" en el texto): son
+        palabras comunes, no nombres mal reconocidos.
+        """
+        indice = self.obtener_indice_difuso()
+        variantes = defaultdict(Counter)
+        palabras = _PATRON_PALABRA.findall(contenido)
+        longitud_minima = self.longitud_minima_difusa + 2 * (self.distancia_difusa - 1)
+        comunes = {palabra for palabra in palabras if palabra[0].islower()}
+
+        for i, palabra in enumerate(palabras):
+            if not i & 0xFFF:
+                self._comprobar_presupuesto()
+            # Solo palabras con mayúscula inicial, como los nombres propios
+            if len(palabra) < 4 or not palabra[0].isupper():
+                continue
+            minuscula = palabra.lower()
+            if minuscula in self.nombres_masculinos or minuscula in self.nombres_femeninos:
+                continue
+            if minuscula in comunes or minuscula in self.palabras_no_difusas:
+                continue
+
+            encontrado = indice.buscar(minuscula)
+            if encontrado is not None and len(palabra) < longitud_minima:
+                if normalizar_texto(encontrado[0]) != normalizar_texto(minuscula):
+                    encontrado = None
+            if encontrado is not None:
+                nombre, genero = encontrado
+                nombres_detectados[genero][nombre] += 1
+                variantes[nombre][palabra] += 1
+                self._comprobar_presupuesto(1)
+
+        nombres_detectados['variantes_difusas'] = {
+            nombre: dict(formas) for nombre, formas in variantes.items()
+        }
+
     def detectar_tratamientos_formales(self, contenido):
         """
         Detecta tratamientos formales (Don, Doña, Sr., Sra., etc.)
@@ -192,11 +1577,13 @@ class DetectorGeneroMusical:
         # Contar tratamientos masculinos
         for patron in self.tratamientos_masculinos:
             matches = re.findall(patron, contenido, re.IGNORECASE)
+            self._comprobar_presupuesto(len(matches))
             tratamientos['masculinos'] += len(matches)
 
         # Contar tratamientos femeninos
         for patron in self.tratamientos_femeninos:
             matches = re.findall(patron, contenido, re.IGNORECASE)
+            self._comprobar_presupuesto(len(matches))
             tratamientos['femeninos'] += len(matches)
 
         return tratamientos
@@ -219,6 +1606,7 @@ class DetectorGeneroMusical:
         for profesion in self.profesiones_masculinas:
             count = len(re.findall(r'\b' + re.escape(profesion) + r'\b',
                                   contenido_lower))
+            self._comprobar_presupuesto(count)
             if count > 0:
                 profesiones['masculinas'][profesion] = count
 
@@ -226,9 +1614,14 @@ class DetectorGeneroMusical:
         for profesion in self.profesiones_femeninas:
             count = len(re.findall(r'\b' + re.escape(profesion) + r'\b',
                                   contenido_lower))
+            self._comprobar_presupuesto(count)
             if count > 0:
                 profesiones['femeninas'][profesion] = count
 
+        # Un solo género por aparición de "pianista", "cantante"... (opcional)
+        if self.desambiguar_profesiones:
+            self._aplicar_desambiguacion(profesiones, _PATRON_PALABRA.findall(contenido_lower))
+
         return profesiones
 
     def detectar_diversidad_cultural(self, contenido):
@@ -244,11 +1637,749 @@ class DetectorGeneroMusical:
         for termino in self.terminos_diversidad:
             count = len(re.findall(r'\b' + re.escape(termino) + r'\b',
                                   contenido_lower))
+            self._comprobar_presupuesto(count)
             if count > 0:
                 diversidad[termino] = count
 
         return diversidad
 
+    def tabla_tratamientos(self):
+        """
+        Palabras de tratamiento derivadas de los patrones formales
+
+        Returns:
+            dict: {'don': 'masculinos', 'sra.': 'femeninos', ...}
+        """
+        tabla = {}
+        for genero, patrones in (('masculinos', self.tratamientos_masculinos),
+                                 ('femeninos', self.tratamientos_femeninos)):
+            for patron in patrones:
+                palabra = patron[len(r'\b'):].split(r'\s+')[0].replace(r'\.', '.')
+                tabla[palabra] = genero
+        return tabla
+
+    def detectar_coocurrencias(self, contenido):
+        """
+        Relaciona cada mención de persona con los términos profesionales
+        situados a menos de self.ventana_coocurrencia palabras, en una sola
+        pasada lineal sobre el texto
+
+        Una mención es un nombre del léxico con mayúscula ("María García")
+        o un tratamiento seguido de palabra con mayúscula ("Doña Carmen",
+        "Sr. Albéniz"); su género es el del nombre o el del tratamiento.
+        La ventana no cruza los puntos finales de frase.
+
+        Returns:
+            Counter: {(genero, persona, profesion): n}
+        """
+        tratamientos, profesiones = self.tablas_coocurrencia()
+        masculinos, femeninos = self.nombres_masculinos, self.nombres_femeninos
+        ventana = self.ventana_coocurrencia
+
+        tokens = _PATRON_TOKEN.findall(contenido)
+        coocurrencias = Counter()
+        personas = deque()   # (última posición, género, persona)
+        oficios = deque()    # (posición, profesión)
+
+        i = 0
+        while i < len(tokens):
+            if not i & 0xFFF:
+                self._comprobar_presupuesto()
+            token = tokens[i]
+            palabra = token.rstrip('.').lower()
+            siguiente = tokens[i + 1] if i + 1 < len(tokens) else ''
+            mencion = None
+
+            genero = tratamientos.get(token.lower())
+            if genero and siguiente[:1].isupper():
+                # Tratamiento + nombre o apellido (+ apellido si es un nombre)
+                partes = [siguiente.rstrip('.')]
+                fin = i + 2
+                nombre = partes[0].lower()
+                if ((nombre in femeninos or nombre in masculinos) and fin < len(tokens)
+                        and tokens[fin][:1].isupper()):
+                    partes.append(tokens[fin].rstrip('.'))
+                    fin += 1
+                mencion = (genero, ' '.join(partes).lower())
+            elif token[:1].isupper() and (palabra in femeninos or palabra in masculinos):
+                # Nombre del léxico (+ apellido con mayúscula)
+                partes = [token.rstrip('.')]
+                fin = i + 1
+                if (not token.endswith('.') and siguiente[:1].isupper()
+                        and siguiente.rstrip('.').lower() not in tratamientos):
+                    partes.append(siguiente.rstrip('.'))
+                    fin += 1
+                mencion = ('femeninos' if palabra in femeninos else 'masculinos',
+                           ' '.join(partes).lower())
+
+            if mencion is not None:
+                genero, persona = mencion
+                while oficios and oficios[0][0] < i - ventana:
+                    oficios.popleft()
+                for _, profesion in oficios:
+                    coocurrencias[(genero, persona, profesion)] += 1
+                personas.append((fin - 1, genero, persona))
+            else:
+                fin = i + 1
+                if palabra in profesiones:
+                    while personas and personas[0][0] < i - ventana:
+                        personas.popleft()
+                    for _, genero, persona in personas:
+                        coocurrencias[(genero, persona, palabra)] += 1
+                    oficios.append((i, palabra))
+
+            # Un punto que no es de abreviatura cierra la frase
+            if tokens[fin - 1].endswith('.') and tokens[fin - 1].lower() not in tratamientos:
+                personas.clear()
+                oficios.clear()
+            i = fin
+
+        return coocurrencias
+
+    def anidar_coocurrencias(self, coocurrencias):
+        """Convierte {(genero, persona, profesion): n} en diccionarios anidados"""
+        anidadas = {'masculinos': {}, 'femeninos': {}}
+        for (genero, persona, profesion), n in sorted(
+                coocurrencias.items(), key=lambda x: (-x[1], x[0])):
+            anidadas[genero].setdefault(persona, {})[profesion] = n
+        return anidadas
+
+    def tablas_coocurrencia(self):
+        """
+        Tratamientos y profesiones que usa detectar_coocurrencias,
+        construidos una vez por proceso. Los nombres se consultan
+        directamente en los léxicos, que con --lexicos-compartidos son
+        tablas mapeadas en memoria y no se copian.
+
+        Si se modifican los tratamientos o las profesiones después de
+        usarlas, asignar self._tablas_coocurrencia = None.
+
+        Returns:
+            tuple: (tabla_tratamientos(), set de profesiones)
+        """
+        if self._tablas_coocurrencia is None:
+            self._tablas_coocurrencia = (
+                self.tabla_tratamientos(),
+                set(self.profesiones_masculinas) | set(self.profesiones_femeninas))
+        return self._tablas_coocurrencia
+
+    # =====================================================================
+    # DESAMBIGUACIÓN DE PROFESIONES DE DOBLE GÉNERO
+    # =====================================================================
+
+    def profesiones_ambiguas(self):
+        """Profesiones de una palabra presentes en las dos listas ("pianista")"""
+        return {profesion for profesion in set(self.profesiones_masculinas)
+                & set(self.profesiones_femeninas) if _PATRON_PALABRA.fullmatch(profesion)}
+
+    def tabla_contexto_genero(self):
+        """
+        Tabla de consulta (construida una vez) para desambiguar profesiones
+
+        Returns:
+            dict: {palabra: 'masculinas' | 'femeninas' | ''}; '' marca los
+                  adjetivos invariables y las palabras de enlace, que se
+                  saltan ("el célebre pianista")
+        """
+        if self._tabla_contexto is None:
+            tabla = {palabra: '' for palabra in self.adjetivos_invariables}
+            tabla.update({palabra: '' for palabra in self.palabras_enlace})
+            tabla.update({palabra: 'masculinas' for palabra in self.contexto_masculino})
+            tabla.update({palabra: 'femeninas' for palabra in self.contexto_femenino})
+            self._tabla_contexto = tabla
+        return self._tabla_contexto
+
+    def _aplicar_desambiguacion(self, profesiones, palabras):
+        """
+        Asigna un solo género a cada aparición de una profesión ambigua,
+        recorriendo la lista de palabras (en minúsculas) ya extraída:
+
+        - hacia atrás, el primer determinante o adjetivo con género ("la
+          pianista", "la joven y brillante pianista"), saltando hasta
+          self.ventana_desambiguacion adjetivos invariables y las palabras
+          de enlace entre ellos. Cualquier otra palabra (un sustantivo, un
+          verbo, otra profesión) corta la búsqueda: pertenece a otro
+          sintagma;
+        - si no lo hay, un nombre del léxico justo detrás ("pianista María").
+
+        Las apariciones sin contexto no suman a ningún género y se cuentan
+        en profesiones['ambiguas'].
+        """
+        ambiguas = self.profesiones_ambiguas()
+        tabla = self.tabla_contexto_genero()
+        ventana = self.ventana_desambiguacion
+        resueltas = {'masculinas': Counter(), 'femeninas': Counter(), 'ambiguas': Counter()}
+
+        for i, palabra in enumerate(palabras):
+            if palabra not in ambiguas:
+                continue
+            genero = None
+            j, saltados = i - 1, 0
+            while j >= 0 and saltados <= ventana:
+                anterior = palabras[j]
+                genero = tabla.get(anterior)
+                if genero != '':
+                    break
+                if anterior not in self.palabras_enlace:
+                    saltados += 1
+                j -= 1
+            if not genero:
+                siguiente = palabras[i + 1] if i + 1 < len(palabras) else ''
+                genero = ('masculinas' if siguiente in self.nombres_masculinos else
+                          'femeninas' if siguiente in self.nombres_femeninos else 'ambiguas')
+            resueltas[genero][palabra] += 1
+
+        for genero, lista in (('masculinas', self.profesiones_masculinas),
+                              ('femeninas', self.profesiones_femeninas)):
+            origen = profesiones[genero]
+            profesiones[genero] = Counter({
+                profesion: resueltas[genero][profesion] if profesion in ambiguas
+                else origen[profesion]
+                for profesion in lista
+                if (resueltas[genero][profesion] if profesion in ambiguas else origen[profesion])
+            })
+        profesiones['ambiguas'] = Counter({
+            profesion: resueltas['ambiguas'][profesion]
+            for profesion in self.profesiones_femeninas if resueltas['ambiguas'][profesion]
+        })
+        return profesiones
+
+    # =====================================================================
+    # DETECTORES ADICIONALES (una sola pasada para todos)
+    # =====================================================================
+
+    def registrar_detector(self, detector):
+        """
+        Añade un DetectorTerminos al análisis
+
+        Sus resultados aparecen en detecciones['adicionales'][seccion] de
+        cada archivo y en 'adicionales' del resumen. Añadir detectores no
+        añade pasadas sobre el texto.
+
+        Las expresiones regulares se unen en una sola alternancia, así que
+        no pueden usar referencias a grupos (\\1, (?P=nombre)), grupos con
+        nombre ni opciones globales como (?x): se rechazan con ValueError.
+        """
+        reservadas = {'palabras', 'nombres', 'tratamientos', 'profesiones', 'diversidad',
+                      'coocurrencias', 'adicionales', 'segmentos', 'lineas'}
+        secciones = {d.seccion for d in self.detectores_registrados}
+        if detector.seccion in reservadas or detector.seccion in secciones:
+            raise ValueError(f"Sección ya en uso: {detector.seccion}")
+        for patrones in detector.patrones.values():
+            for patron in patrones:
+                self._validar_patron_registrado(detector.seccion, patron)
+        self.detectores_registrados.append(detector)
+        self._motor_registrados = None
+
+    def _validar_patron_registrado(self, seccion, patron):
+        """Comprueba que un patrón se puede unir a la alternancia común"""
+        try:
+            compilado = re.compile('(?:' + patron + ')()', re.IGNORECASE)
+        except re.error as e:
+            raise ValueError(f"Patrón no válido en '{seccion}': {patron!r} ({e})")
+        if compilado.groupindex:
+            raise ValueError(f"Patrón con grupos con nombre en '{seccion}': {patron!r}")
+        if re.search(r'(?<!\\)(?:\\\\)*\\(?:[1-9]|g<)|\(\?P=', patron):
+            raise ValueError(f"Patrón con referencias a grupos en '{seccion}': {patron!r}")
+
+    def obtener_motor_registrados(self):
+        """
+        Tablas de búsqueda de todos los detectores registrados (una vez
+        por proceso)
+
+        Los términos se indexan por su primera palabra, con el resto de
+        palabras y los detectores que los esperan; todas las expresiones
+        regulares se unen en una sola alternancia con un grupo vacío al
+        final de cada una, de modo que m.lastindex identifica el patrón;
+        cada patrón se compila también por separado para entregar al
+        detector una coincidencia con sus propios grupos.
+        """
+        if self._motor_registrados is not None:
+            return self._motor_registrados
+
+        frases = defaultdict(dict)
+        alternativas = []
+        destinos_patron = {}
+        grupos = 0
+        for indice, detector in enumerate(self.detectores_registrados):
+            for categoria, terminos in detector.terminos.items():
+                for termino in terminos:
+                    termino = termino.lower()
+                    palabras = _PATRON_PALABRA.findall(termino)
+                    if not palabras:
+                        continue
+                    _, destinos = frases[palabras[0]].setdefault(
+                        termino, (palabras[1:], []))
+                    destinos.append((indice, categoria))
+            for categoria, patrones in detector.patrones.items():
+                for patron in patrones:
+                    propio = re.compile(patron, re.IGNORECASE)
+                    grupos += propio.groups + 1
+                    alternativas.append('(?:' + patron + ')()')
+                    destinos_patron[grupos] = (indice, categoria, propio)
+
+        self._motor_registrados = {
+            'frases': {primera: list(terminos.items()) for primera, terminos in frases.items()},
+            'patron': re.compile('|'.join(alternativas), re.IGNORECASE) if alternativas else None,
+            'destinos_patron': destinos_patron
+        }
+        return self._motor_registrados
+
+    def detectar_registrados(self, contenido):
+        """
+        Ejecuta todos los detectores registrados con una sola pasada por
+        las palabras del texto (y otra por la alternancia de expresiones
+        regulares, si algún detector las declara)
+
+        Un término se cuenta en cada aparición como palabras completas
+        consecutivas, aunque se solape con otro ("orquesta" y "orquesta
+        sinfónica"). Las expresiones regulares no se solapan entre sí.
+
+        Returns:
+            dict: {seccion: estado del detector}
+        """
+        motor = self.obtener_motor_registrados()
+        detectores = self.detectores_registrados
+        estados = [detector.iniciar() for detector in detectores]
+        palabras = _PATRON_PALABRA.findall(contenido.lower())
+        frases = motor['frases']
+        coincidencias = 0
+
+        for i, palabra in enumerate(palabras):
+            if not i & 0xFFFF:
+                self._comprobar_presupuesto(coincidencias)
+                coincidencias = 0
+            candidatos = frases.get(palabra)
+            if candidatos is None:
+                continue
+            for termino, (resto, destinos) in candidatos:
+                if resto and palabras[i + 1:i + 1 + len(resto)] != resto:
+                    continue
+                coincidencias += 1
+                for indice, categoria in destinos:
+                    detectores[indice].coincidencia(estados[indice], categoria, termino, i, palabras)
+
+        if motor['patron'] is not None:
+            destinos_patron = motor['destinos_patron']
+            for m in motor['patron'].finditer(contenido):
+                indice, categoria, propio = destinos_patron[m.lastindex]
+                # La misma coincidencia, con la numeración de grupos del patrón
+                m = propio.match(contenido, m.start())
+                detectores[indice].coincidencia_patron(estados[indice], categoria, m)
+                coincidencias += 1
+        self._comprobar_presupuesto(coincidencias)
+
+        return {detector.seccion: estado for detector, estado in zip(detectores, estados)}
+
+    # =====================================================================
+    # MOTOR COMBINADO (una pasada por categoría)
+    # =====================================================================
+
+    def obtener_motor_combinado(self):
+        """
+        Compila (una vez por proceso) las expresiones del motor combinado
+
+        Los términos que no son una sola palabra (p. ej. "mezzo-soprano") o
+        los tratamientos con otra forma que r'\\bPALABRA\\s+\\w+' se cuentan
+        con su expresión individual, igual que en el motor de referencia.
+        Si se modifican los léxicos, asignar self._motor_combinado = None.
+        """
+        if self._motor_combinado is not None:
+            return self._motor_combinado
+
+        palabra_sola = re.compile(r'\w+')
+
+        # Nombres: una sola alternancia factorizada por prefijos
+        alternativa, nombres = alternativa_por_prefijos(
+            n for n in self.nombres_masculinos | self.nombres_femeninos
+            if palabra_sola.fullmatch(n))
+        patron_nombres = re.compile(r'\b' + alternativa + r'\b', re.IGNORECASE)
+        nombres_sueltos = [n for n in self.nombres_masculinos | self.nombres_femeninos
+                           if not palabra_sola.fullmatch(n)]
+
+        # Tratamientos: la palabra de tratamiento con la cola en lookahead
+        tratamientos = []
+        tratamientos_sueltos = []
+        for genero, patrones in (('masculinos', self.tratamientos_masculinos),
+                                 ('femeninos', self.tratamientos_femeninos)):
+            for patron in patrones:
+                if patron.startswith(r'\b') and patron.endswith(r'\s+\w+'):
+                    tratamientos.append((genero, patron[len(r'\b'):-len(r'\s+\w+')]))
+                else:
+                    tratamientos_sueltos.append((genero, patron))
+        patron_tratamientos = re.compile(
+            r'\b(?:' + '|'.join('(' + palabra + ')' for _, palabra in tratamientos) + r')(?=\s+\w)',
+            re.IGNORECASE)
+
+        # Profesiones y diversidad: recuento de palabras del texto en minúsculas
+        terminos = defaultdict(list)
+        terminos_sueltos = []
+        for categoria, genero, lista in (('profesiones', 'masculinas', self.profesiones_masculinas),
+                                         ('profesiones', 'femeninas', self.profesiones_femeninas),
+                                         ('diversidad', None, self.terminos_diversidad)):
+            for termino in lista:
+                if palabra_sola.fullmatch(termino):
+                    terminos[termino].append((categoria, genero))
+                else:
+                    terminos_sueltos.append((categoria, genero, termino))
+
+        self._motor_combinado = {
+            'nombres': nombres,
+            'patron_nombres': patron_nombres,
+            'sufijo_nombre': re.compile(r'(?:\s+[A-ZÁÉÍÓÚÑ][a-záéíóúñ]+)?', re.IGNORECASE),
+            'nombres_sueltos': nombres_sueltos,
+            'tratamientos': tratamientos,
+            'patron_tratamientos': patron_tratamientos,
+            'cola_tratamiento': re.compile(r'\s+\w+'),
+            'tratamientos_sueltos': tratamientos_sueltos,
+            'terminos': dict(terminos),
+            'terminos_sueltos': terminos_sueltos
+        }
+        return self._motor_combinado
+
+    def detectar_nombres_combinado(self, contenido):
+        """
+        Igual que detectar_nombres_personas, con una sola búsqueda para
+        todos los nombres
+
+        Cada nombre conserva su propio final de la última coincidencia:
+        como en la búsqueda por nombre, una aparición que cae dentro del
+        apellido de la anterior ("María María") no se cuenta.
+        """
+        motor = self.obtener_motor_combinado()
+        nombres = motor['nombres']
+        sufijo = motor['sufijo_nombre'].match
+        conteos = Counter()
+        ejemplos = defaultdict(list)
+        ultimo_fin = {}
+
+        for m in motor['patron_nombres'].finditer(contenido):
+            nombre = nombres[m.lastindex - 1]
+            inicio = m.start()
+            if inicio < ultimo_fin.get(nombre, 0):
+                continue
+            fin = sufijo(contenido, m.end()).end()
+            ultimo_fin[nombre] = fin
+            conteos[nombre] += 1
+            if len(ejemplos[nombre]) < 5:
+                ejemplos[nombre].append(contenido[inicio:fin])
+        self._comprobar_presupuesto(sum(conteos.values()))
+
+        for nombre in motor['nombres_sueltos']:
+            patron = r'\b' + nombre.capitalize() + r'\b(?:\s+[A-ZÁÉÍÓÚÑ][a-záéíóúñ]+)?'
+            matches = list(re.finditer(patron, contenido, re.IGNORECASE))
+            self._comprobar_presupuesto(len(matches))
+            conteos[nombre] = len(matches)
+            ejemplos[nombre] = [m.group(0) for m in matches[:5]]
+
+        nombres_detectados = {
+            'masculinos': Counter(),
+            'femeninos': Counter(),
+            'ejemplos_masculinos': {},
+            'ejemplos_femeninos': {}
+        }
+        for genero, lexico in (('masculinos', self.nombres_masculinos),
+                               ('femeninos', self.nombres_femeninos)):
+            for nombre in lexico:
+                if conteos[nombre] > 0:
+                    nombres_detectados[genero][nombre] = conteos[nombre]
+                    nombres_detectados['ejemplos_' + genero][nombre] = list(
+                        set([ejemplo.strip() for ejemplo in ejemplos[nombre]]))[:3]
+
+        if self.coincidencia_difusa:
+            self._detectar_nombres_difusos(contenido, nombres_detectados)
+
+        return nombres_detectados
+
+    def detectar_tratamientos_combinado(self, contenido):
+        """
+        Igual que detectar_tratamientos_formales, con una sola búsqueda
+
+        Cada patrón conserva su propio final de la última coincidencia, de
+        modo que "Sr. D. Manuel" cuenta para "sr." y para "d." pero
+        "don don Pedro" cuenta una sola vez.
+        """
+        motor = self.obtener_motor_combinado()
+        tratamientos = motor['tratamientos']
+        cola = motor['cola_tratamiento'].match
+        resultado = {'masculinos': 0, 'femeninos': 0}
+        ultimo_fin = [0] * len(tratamientos)
+
+        for m in motor['patron_tratamientos'].finditer(contenido):
+            indice = m.lastindex - 1
+            if m.start() < ultimo_fin[indice]:
+                continue
+            ultimo_fin[indice] = cola(contenido, m.end()).end()
+            resultado[tratamientos[indice][0]] += 1
+        self._comprobar_presupuesto(resultado['masculinos'] + resultado['femeninos'])
+
+        for genero, patron in motor['tratamientos_sueltos']:
+            matches = re.findall(patron, contenido, re.IGNORECASE)
+            self._comprobar_presupuesto(len(matches))
+            resultado[genero] += len(matches)
+
+        return resultado
+
+    def _contar_terminos_combinado(self, contenido):
+        """
+        Conteo de profesiones y términos de diversidad en una pasada
+
+        Un término de una sola palabra aparece como r'\\bTERMINO\\b' justo
+        cuando es una palabra completa del texto, así que basta contar las
+        palabras una vez. Se reutiliza entre las dos etapas del mismo texto.
+        """
+        if self._terminos_combinados is not None and self._terminos_combinados[0] is contenido:
+            return self._terminos_combinados[1:]
+
+        motor = self.obtener_motor_combinado()
+        contenido_lower = contenido.lower()
+        lista_palabras = _PATRON_PALABRA.findall(contenido_lower)
+        palabras = Counter(lista_palabras)
+
+        conteos = defaultdict(Counter)
+        for termino, destinos in motor['terminos'].items():
+            n = palabras.get(termino, 0)
+            if n:
+                for destino in destinos:
+                    conteos[destino][termino] = n
+        for categoria, genero, termino in motor['terminos_sueltos']:
+            n = len(re.findall(r'\b' + re.escape(termino) + r'\b', contenido_lower))
+            if n:
+                conteos[(categoria, genero)][termino] = n
+
+        self._terminos_combinados = (contenido, conteos, lista_palabras)
+        return conteos, lista_palabras
+
+    def detectar_profesiones_combinado(self, contenido):
+        """Igual que detectar_profesiones_musicales, en una sola pasada"""
+        conteos, palabras = self._contar_terminos_combinado(contenido)
+        profesiones = {}
+        for genero, lista in (('masculinas', self.profesiones_masculinas),
+                              ('femeninas', self.profesiones_femeninas)):
+            origen = conteos[('profesiones', genero)]
+            profesiones[genero] = Counter(
+                {profesion: origen[profesion] for profesion in lista if origen[profesion]})
+            self._comprobar_presupuesto(sum(profesiones[genero].values()))
+        if self.desambiguar_profesiones:
+            self._aplicar_desambiguacion(profesiones, palabras)
+        return profesiones
+
+    def detectar_diversidad_combinado(self, contenido):
+        """Igual que detectar_diversidad_cultural, en una sola pasada"""
+        origen = self._contar_terminos_combinado(contenido)[0][('diversidad', None)]
+        diversidad = Counter(
+            {termino: origen[termino] for termino in self.terminos_diversidad if origen[termino]})
+        self._comprobar_presupuesto(sum(diversidad.values()))
+        self._terminos_combinados = None
+        return diversidad
+
+    # =====================================================================
+    # VERIFICACIÓN DE MOTORES
+    # =====================================================================
+
+    def verificar_motor(self, motor='combinado', directorio=None, textos_aleatorios=200,
+                        semilla=0):
+        """
+        Compara término a término el motor indicado con el de referencia
+
+        Se analizan con los dos motores todos los .txt y .wrd de directorio
+        (por defecto los corpus de LeximusUSAL) y textos aleatorios con
+        el léxico mezclado con palabras comunes, mayúsculas, tildes,
+        guiones y repeticiones.
+
+        Returns:
+            dict: Textos comparados, tiempos de cada motor y diferencias
+                  agregadas por (categoria, genero, termino)
+        """
+        if motor not in self.MOTORES:
+            raise ValueError(f"Motor desconocido: {motor}")
+
+        textos = []
+        if directorio is not None:
+            for root, dirs, files in os.walk(directorio):
+                dirs.sort()
+                for file in sorted(files):
+                    if file.endswith(('.txt', '.wrd')):
+                        textos.append(os.path.join(root, file))
+        rng = random.Random(semilla)
+        textos.extend(f"aleatorio-{semilla}-{i}" for i in range(textos_aleatorios))
+
+        print(f"🔬 Verificando el motor '{motor}' con {len(textos)} textos")
+        segundos = Counter()
+        diferencias = {}
+        textos_con_diferencias = []
+        for texto in textos:
+            if texto.startswith('aleatorio-'):
+                contenido = self.generar_texto_prueba(rng)
+            else:
+                with open(texto, 'r', encoding='utf-8', errors='ignore') as f:
+                    contenido = f.read()
+
+            conteos = {}
+            for nombre in ('referencia', motor):
+                inicio = time.perf_counter()
+                detecciones = self.detectar_todo(contenido, motor=nombre)
+                segundos[nombre] += time.perf_counter() - inicio
+                conteos[nombre] = {
+                    (categoria, genero, termino): n for categoria, genero, termino, n
+                    in celdas_conteo(self.construir_resultado(texto, detecciones))
+                }
+
+            distintas = 0
+            for clave in conteos['referencia'].keys() | conteos[motor].keys():
+                esperado = conteos['referencia'].get(clave, 0)
+                obtenido = conteos[motor].get(clave, 0)
+                if esperado != obtenido:
+                    distintas += 1
+                    diferencia = diferencias.setdefault(
+                        clave, {'referencia': 0, 'motor': 0, 'textos': []})
+                    diferencia['referencia'] += esperado
+                    diferencia['motor'] += obtenido
+                    diferencia['textos'].append(texto)
+            if distintas:
+                textos_con_diferencias.append(texto)
+
+        return {
+            'motor': motor,
+            'directorio': directorio,
+            'semilla': semilla,
+            'textos': len(textos),
+            'textos_aleatorios': textos_aleatorios,
+            'textos_con_diferencias': textos_con_diferencias,
+            'segundos': {nombre: round(s, 3) for nombre, s in segundos.items()},
+            'diferencias': [
+                {'categoria': categoria, 'genero': genero, 'termino': termino,
+                 'referencia': d['referencia'], 'motor': d['motor'],
+                 'textos': d['textos'][:10]}
+                for (categoria, genero, termino), d in sorted(diferencias.items())
+            ]
+        }
+
+    def generar_texto_prueba(self, rng, palabras=3000):
+        """
+        Texto aleatorio con aspecto de prensa en español para verificar
+        motores: mezcla palabras comunes con nombres, tratamientos,
+        profesiones y términos de diversidad en variantes difíciles
+        (MAYÚSCULAS, sin tilde, pegadas con guion, repetidas...)
+        """
+        comunes = [
+            'el', 'la', 'los', 'las', 'de', 'del', 'en', 'y', 'que', 'con', 'por',
+            'una', 'un', 'su', 'al', 'se', 'no', 'teatro', 'concierto', 'orquesta',
+            'ópera', 'zarzuela', 'obra', 'público', 'aplausos', 'Madrid', 'Barcelona',
+            'Real', 'Sociedad', 'García', 'López', 'Albéniz', 'Granados', 'Falla',
+            'Turina', 'Núñez', 'Ávila', 'Iturbi', 'Ibáñez', 'Müller', 'Ñ', 'X', 'señorita'
+        ]
+        lexico = (sorted(self.nombres_masculinos) + sorted(self.nombres_femeninos) +
+                  sorted(self.tabla_tratamientos()) + self.profesiones_masculinas +
+                  self.profesiones_femeninas + self.terminos_diversidad)
+        separadores = [' '] * 12 + ['  ', '\n', '\n\n', ', ', '. ', '; ', ': ', '-',
+                                    ' — ', ' (', ') ', '\t', '\xa0', '"', '¿', '!', '/']
+
+        partes = []
+        for _ in range(palabras):
+            palabra = rng.choice(lexico) if rng.random() < 0.35 else rng.choice(comunes)
+            variante = rng.random()
+            if variante < 0.35:
+                palabra = palabra.capitalize()
+            elif variante < 0.45:
+                palabra = palabra.upper()
+            elif variante < 0.5:
+                palabra = normalizar_texto(palabra).capitalize()
+            elif variante < 0.55:
+                palabra = palabra + rng.choice(['s', 'es', '1', 'ü', '_', 'ª'])
+            elif variante < 0.6:
+                palabra = palabra + ' ' + palabra
+            partes.append(palabra)
+            partes.append(rng.choice(separadores))
+        return ''.join(partes)
+
+    # =====================================================================
+    # SEGMENTACIÓN EN ARTÍCULOS O SECCIONES
+    # =====================================================================
+
+    def es_titulo(self, linea):
+        """Línea corta en mayúsculas, como "NOTICIAS MUSICALES" o "CONCIERTOS" """
+        texto = linea.strip()
+        return (0 < len(texto) <= self.longitud_maxima_titulo
+                and texto == texto.upper()
+                and any(c.isalpha() for c in texto))
+
+    def detectar_por_segmentos(self, lineas):
+        """
+        Divide un texto en segmentos mientras se lee línea a línea y
+        analiza cada segmento al cerrarse, sin una segunda pasada
+
+        Un segmento nuevo empieza tras self.lineas_vacias_segmento líneas
+        vacías seguidas, en una línea con el marcador de sección
+        (self.marcador_seccion, p. ej. "SECCIÓN DE CONCIERTOS") o en un
+        título en mayúsculas precedido de una línea vacía.
+
+        Args:
+            lineas (iterable): Archivo abierto en modo texto o io.StringIO
+
+        Returns:
+            dict: Detecciones del texto completo (suma de las de los
+                  segmentos, ver detectar_todo) con 'segmentos' (resumen
+                  de cada uno) y 'lineas' (saltos de línea leídos)
+        """
+        marcador = re.compile(self.marcador_seccion, re.IGNORECASE)
+        parciales = []
+        segmentos = []
+        actual = []
+        inicio = 1
+        vacias = 0
+        numero = 0
+        linea = ''
+
+        for numero, linea in enumerate(lineas, 1):
+            if not linea.strip():
+                vacias += 1
+                actual.append(linea)
+                continue
+            corte = (vacias >= self.lineas_vacias_segmento
+                     or marcador.match(linea)
+                     or (vacias and self.es_titulo(linea)))
+            if corte and len(actual) > vacias:
+                self._cerrar_segmento(actual, inicio, numero - 1, parciales, segmentos)
+                actual = []
+                inicio = numero
+            vacias = 0
+            actual.append(linea)
+
+        if len(actual) > vacias:
+            self._cerrar_segmento(actual, inicio, numero, parciales, segmentos)
+
+        detecciones = self.combinar_detecciones(parciales)
+        detecciones['segmentos'] = segmentos
+        detecciones['lineas'] = numero if linea.endswith('\n') else numero - 1
+        return detecciones
+
+    def _cerrar_segmento(self, lineas, inicio, fin, parciales, segmentos):
+        """Analiza las líneas de un segmento y guarda su resumen"""
+        detecciones = self.detectar_todo(''.join(lineas))
+        parciales.append(detecciones)
+
+        titulo = next(linea.strip() for linea in lineas if linea.strip())
+        nombres = detecciones['nombres']
+        tratamientos = detecciones['tratamientos']
+        profesiones = detecciones['profesiones']
+        masculino, femenino = self._totales_detecciones(detecciones)
+        segmentos.append({
+            'indice': len(segmentos),
+            'titulo': titulo[:self.longitud_maxima_titulo],
+            'linea_inicio': inicio,
+            'linea_fin': fin,
+            'palabras': detecciones['palabras'],
+            'nombres': {'masculinos': sum(nombres['masculinos'].values()),
+                        'femeninos': sum(nombres['femeninos'].values())},
+            'tratamientos': dict(tratamientos),
+            'profesiones': {'masculinas': sum(profesiones['masculinas'].values()),
+                            'femeninas': sum(profesiones['femeninas'].values())},
+            'menciones_masculinas': masculino,
+            'menciones_femeninas': femenino,
+            'ratio_sesgo': self.calcular_ratio_genero(masculino, femenino)
+        })
+
     # =====================================================================
     # ANÁLISIS ESTADÍSTICO
     # =====================================================================
@@ -264,139 +2395,1515 @@ class DetectorGeneroMusical:
             return float('inf') if masculino > 0 else 0.0
         return round(masculino / femenino, 2)
 
-    def analizar_archivo(self, filepath):
+    def etapas_deteccion(self, motor=None):
         """
-        Analiza un archivo de texto completo
+        Detectores de cada etapa para el motor indicado
 
         Returns:
-            dict: Resultados completos del análisis
+            list: [(etapa, función)] en orden de ejecución
         """
-        try:
-            with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-                contenido = f.read()
-
-            # Conteo de palabras
-            palabras = len(contenido.split())
-
-            # Detecciones
-            nombres = self.detectar_nombres_personas(contenido)
-            tratamientos = self.detectar_tratamientos_formales(contenido)
-            profesiones = self.detectar_profesiones_musicales(contenido)
-            diversidad = self.detectar_diversidad_cultural(contenido)
-
-            # Totales
-            total_masculino = (
-                sum(nombres['masculinos'].values()) +
-                tratamientos['masculinos'] +
-                sum(profesiones['masculinas'].values())
-            )
-
-            total_femenino = (
-                sum(nombres['femeninos'].values()) +
-                tratamientos['femeninos'] +
-                sum(profesiones['femeninas'].values())
-            )
-
-            # Resultados
-            resultado = {
-                'archivo': os.path.basename(filepath),
-                'ruta': filepath,
-                'palabras': palabras,
-                'detecciones': {
-                    'nombres': {
-                        'masculinos': dict(nombres['masculinos']),
-                        'femeninos': dict(nombres['femeninos']),
-                        'ejemplos_masculinos': nombres.get('ejemplos_masculinos', {}),
-                        'ejemplos_femeninos': nombres.get('ejemplos_femeninos', {}),
-                        'total_masculinos': sum(nombres['masculinos'].values()),
-                        'total_femeninos': sum(nombres['femeninos'].values())
-                    },
-                    'tratamientos': tratamientos,
-                    'profesiones': {
-                        'masculinas': dict(profesiones['masculinas']),
-                        'femeninas': dict(profesiones['femeninas']),
-                        'total_masculinas': sum(profesiones['masculinas'].values()),
-                        'total_femeninas': sum(profesiones['femeninas'].values())
-                    },
-                    'diversidad': dict(diversidad),
-                    'total_diversidad': sum(diversidad.values())
-                },
-                'totales': {
-                    'menciones_masculinas': total_masculino,
-                    'menciones_femeninas': total_femenino,
-                    'ratio_sesgo': self.calcular_ratio_genero(
-                        total_masculino, total_femenino
-                    )
-                }
-            }
+        if motor is None:
+            motor = self.motor_deteccion
+        if motor == 'referencia':
+            etapas = [
+                ('nombres', self.detectar_nombres_personas),
+                ('tratamientos', self.detectar_tratamientos_formales),
+                ('profesiones', self.detectar_profesiones_musicales),
+                ('diversidad', self.detectar_diversidad_cultural)
+            ]
+        elif motor == 'combinado':
+            etapas = [
+                ('nombres', self.detectar_nombres_combinado),
+                ('tratamientos', self.detectar_tratamientos_combinado),
+                ('profesiones', self.detectar_profesiones_combinado),
+                ('diversidad', self.detectar_diversidad_combinado)
+            ]
+        else:
+            raise ValueError(f"Motor desconocido: {motor}")
+        if self.analizar_coocurrencias:
+            etapas.append(('coocurrencias', self.detectar_coocurrencias))
+        if self.detectores_registrados:
+            etapas.append(('adicionales', self.detectar_registrados))
+        return etapas
+
+    def detectar_todo(self, contenido, motor=None):
+        """
+        Ejecuta todos los detectores sobre un texto (archivo o fragmento)
 
-            return resultado
+        Args:
+            contenido (str): Texto a analizar
+            motor (str): 'referencia' o 'combinado' (por defecto
+                         self.motor_deteccion)
 
-        except Exception as e:
-            print(f"❌ Error analizando {filepath}: {e}")
-            return None
+        Returns:
+            dict: Detecciones sin consolidar ('palabras', 'nombres',
+                  'tratamientos', 'profesiones', 'diversidad')
+        """
+        detecciones = {'palabras': len(contenido.split())}
+        for etapa, detector in self.etapas_deteccion(motor):
+            self._comprobar_presupuesto(etapa=etapa)
+            inicio = time.perf_counter()
+            detecciones[etapa] = detector(contenido)
+            self.segundos_etapas[etapa] += time.perf_counter() - inicio
+        return detecciones
 
-    def analizar_directorio(self, directorio=None):
+    def combinar_detecciones(self, parciales):
         """
-        Analiza todos los archivos TXT en un directorio
+        Suma las detecciones de varios fragmentos de un mismo documento
 
         Args:
-            directorio (str): Ruta al directorio (usa base_directory si None)
+            parciales (list): Salidas de detectar_todo() en orden de lectura
+
+        Returns:
+            dict: Detecciones equivalentes a las del documento completo
         """
-        if directorio is None:
-            directorio = self.base_directory
+        combinadas = {
+            'palabras': 0,
+            'nombres': {
+                'masculinos': Counter(),
+                'femeninos': Counter(),
+                'ejemplos_masculinos': {},
+                'ejemplos_femeninos': {},
+                'variantes_difusas': {}
+            },
+            'tratamientos': {'masculinos': 0, 'femeninos': 0},
+            'profesiones': {'masculinas': Counter(), 'femeninas': Counter()},
+            'diversidad': Counter()
+        }
+
+        lineas = 0
+        adicionales = {}
+        for parcial in parciales:
+            combinadas['palabras'] += parcial['palabras']
+            if 'segmentos' in parcial:
+                # Numeración continua de segmentos y líneas entre fragmentos
+                segmentos = combinadas.setdefault('segmentos', [])
+                for segmento in parcial['segmentos']:
+                    segmentos.append(dict(segmento, indice=len(segmentos),
+                                          linea_inicio=segmento['linea_inicio'] + lineas,
+                                          linea_fin=segmento['linea_fin'] + lineas))
+                lineas += parcial['lineas']
+                combinadas['lineas'] = lineas
+            for genero in ('masculinos', 'femeninos'):
+                combinadas['nombres'][genero].update(parcial['nombres'][genero])
+                ejemplos = combinadas['nombres']['ejemplos_' + genero]
+                for nombre, lista in parcial['nombres']['ejemplos_' + genero].items():
+                    actuales = ejemplos.setdefault(nombre, [])
+                    for ejemplo in lista:
+                        if ejemplo not in actuales and len(actuales) < 3:
+                            actuales.append(ejemplo)
+                combinadas['tratamientos'][genero] += parcial['tratamientos'][genero]
+            for nombre, formas in parcial['nombres'].get('variantes_difusas', {}).items():
+                actuales = combinadas['nombres']['variantes_difusas'].setdefault(nombre, Counter())
+                actuales.update(formas)
+            for genero in ('masculinas', 'femeninas'):
+                combinadas['profesiones'][genero].update(parcial['profesiones'][genero])
+            if 'ambiguas' in parcial['profesiones']:
+                combinadas['profesiones'].setdefault('ambiguas', Counter()).update(
+                    parcial['profesiones']['ambiguas'])
+            combinadas['diversidad'].update(parcial['diversidad'])
+            if 'coocurrencias' in parcial:
+                combinadas.setdefault('coocurrencias', Counter()).update(
+                    parcial['coocurrencias'])
+            for seccion, estado in parcial.get('adicionales', {}).items():
+                adicionales.setdefault(seccion, []).append(estado)
+
+        variantes = combinadas['nombres']['variantes_difusas']
+        if variantes:
+            combinadas['nombres']['variantes_difusas'] = {
+                nombre: dict(formas) for nombre, formas in variantes.items()
+            }
+        else:
+            del combinadas['nombres']['variantes_difusas']
+
+        if adicionales:
+            combinadas['adicionales'] = {
+                detector.seccion: detector.combinar(adicionales.get(detector.seccion, []))
+                for detector in self.detectores_registrados
+            }
+
+        return combinadas
+
+    def construir_resultado(self, filepath, detecciones):
+        """
+        Construye el diccionario de resultados de un archivo a partir de
+        sus detecciones
+
+        Returns:
+            dict: Resultados completos del análisis
+        """
+        nombres = detecciones['nombres']
+        tratamientos = detecciones['tratamientos']
+        profesiones = detecciones['profesiones']
+        diversidad = detecciones['diversidad']
+
+        # Totales
+        total_masculino, total_femenino = self._totales_detecciones(detecciones)
+
+        # Resultados
+        resultado = {
+            'archivo': os.path.basename(filepath),
+            'ruta': filepath,
+            'palabras': detecciones['palabras'],
+            'detecciones': {
+                'nombres': {
+                    'masculinos': dict(nombres['masculinos']),
+                    'femeninos': dict(nombres['femeninos']),
+                    'ejemplos_masculinos': nombres.get('ejemplos_masculinos', {}),
+                    'ejemplos_femeninos': nombres.get('ejemplos_femeninos', {}),
+                    'total_masculinos': sum(nombres['masculinos'].values()),
+                    'total_femeninos': sum(nombres['femeninos'].values())
+                },
+                'tratamientos': tratamientos,
+                'profesiones': {
+                    'masculinas': dict(profesiones['masculinas']),
+                    'femeninas': dict(profesiones['femeninas']),
+                    'total_masculinas': sum(profesiones['masculinas'].values()),
+                    'total_femeninas': sum(profesiones['femeninas'].values())
+                },
+                'diversidad': dict(diversidad),
+                'total_diversidad': sum(diversidad.values())
+            },
+            'totales': {
+                'menciones_masculinas': total_masculino,
+                'menciones_femeninas': total_femenino,
+                'ratio_sesgo': self.calcular_ratio_genero(
+                    total_masculino, total_femenino
+                )
+            }
+        }
+
+        if 'variantes_difusas' in nombres:
+            resultado['detecciones']['nombres']['variantes_difusas'] = nombres['variantes_difusas']
+        if 'ambiguas' in profesiones:
+            resultado['detecciones']['profesiones']['ambiguas'] = dict(profesiones['ambiguas'])
+        if 'coocurrencias' in detecciones:
+            resultado['detecciones']['coocurrencias'] = self.anidar_coocurrencias(
+                detecciones['coocurrencias'])
+        if 'adicionales' in detecciones:
+            resultado['detecciones']['adicionales'] = {
+                detector.seccion: detector.resultado(detecciones['adicionales'][detector.seccion])
+                for detector in self.detectores_registrados
+            }
+        if 'segmentos' in detecciones:
+            resultado['segmentos'] = detecciones['segmentos']
+
+        return resultado
+
+    def _totales_detecciones(self, detecciones):
+        """Menciones (masculinas, femeninas): nombres + tratamientos + profesiones"""
+        nombres = detecciones['nombres']
+        tratamientos = detecciones['tratamientos']
+        profesiones = detecciones['profesiones']
+        total_masculino = (
+            sum(nombres['masculinos'].values()) +
+            tratamientos['masculinos'] +
+            sum(profesiones['masculinas'].values())
+        )
+        total_femenino = (
+            sum(nombres['femeninos'].values()) +
+            tratamientos['femeninos'] +
+            sum(profesiones['femeninas'].values())
+        )
+        return total_masculino, total_femenino
+
+    def analizar_archivo(self, filepath):
+        """
+        Analiza un archivo de texto completo
+
+        Si el archivo supera los límites de bytes, tiempo o coincidencias,
+        queda en cuarentena (ver self.problemas) y, si se ha activado
+        self.reintentar_por_fragmentos, se reintenta por fragmentos.
+
+        Returns:
+            dict: Resultados completos del análisis
+        """
+        try:
+            self._etapa_actual = 'lectura'
+            tamano = os.path.getsize(filepath)
+            if self.limite_bytes_archivo and tamano > self.limite_bytes_archivo:
+                raise PresupuestoExcedido('bytes', 'lectura', f"{tamano:,} bytes")
+
+            with self._vigilar():
+                with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
+                    if self.segmentar:
+                        detecciones = self.detectar_por_segmentos(f)
+                    else:
+                        detecciones = self.detectar_todo(f.read())
+
+            return self.construir_resultado(filepath, detecciones)
+
+        except PresupuestoExcedido as e:
+            print(f"⏱️  En cuarentena {filepath}: {e}")
+            problema = self._registrar_problema(filepath, e)
+            if self.reintentar_por_fragmentos:
+                return self._reintentar_por_fragmentos(filepath, problema)
+            return None
+
+        except Exception as e:
+            print(f"❌ Error analizando {filepath}: {e}")
+            self._registrar_problema(filepath, e)
+            return None
+
+    def analizar_fragmento(self, filepath, inicio, fin):
+        """
+        Analiza un rango de bytes de un archivo grande
+
+        Los cortes se desplazan al siguiente párrafo (o salto de línea, o
+        espacio), de modo que fragmentos contiguos cubren el archivo sin
+        solaparse ni partir palabras. Solo una mención partida justo en el
+        corte (p. ej. "Don" al final de un párrafo) puede perderse.
+
+        Returns:
+            dict: Detecciones del fragmento (ver detectar_todo), o None
+        """
+        try:
+            return self._detectar_fragmento(filepath, inicio, fin)
+
+        except PresupuestoExcedido as e:
+            print(f"⏱️  En cuarentena {filepath} [{inicio}:{fin}]: {e}")
+            self._registrar_problema(filepath, e, fragmento=[inicio, fin])
+            return None
+
+        except Exception as e:
+            print(f"❌ Error analizando {filepath} [{inicio}:{fin}]: {e}")
+            self._registrar_problema(filepath, e, fragmento=[inicio, fin])
+            return None
+
+    def _detectar_fragmento(self, filepath, inicio, fin):
+        """Detecciones de un rango de bytes, con su propio presupuesto (las
+        excepciones se propagan)"""
+        self._etapa_actual = 'lectura'
+        with self._vigilar():
+            with open(filepath, 'rb') as f:
+                inicio = self._alinear_corte(f, inicio)
+                fin = self._alinear_corte(f, fin)
+                f.seek(inicio)
+                datos = f.read(max(0, fin - inicio))
+
+            texto = datos.decode('utf-8', errors='ignore')
+            if self.segmentar:
+                return self.detectar_por_segmentos(io.StringIO(texto, newline=None))
+            return self.detectar_todo(texto)
+
+    def _reintentar_por_fragmentos(self, filepath, problema, rangos=None, partes=()):
+        """
+        Reanaliza por fragmentos un archivo en cuarentena
+
+        Se empieza con 8 fragmentos (o con fragmentos de
+        self.limite_bytes_archivo), o con los rangos indicados, cada uno
+        con su propio presupuesto. Un
+        fragmento que lo vuelve a agotar se divide por la mitad, y así
+        hasta self.bytes_minimos_reintento: un archivo muy por encima del
+        límite se recupera con más divisiones. Los rangos que no se pueden
+        recuperar se anotan en problema['fragmentos_descartados'], no como
+        problemas aparte.
+
+        Args:
+            rangos: [(inicio, fin)] a reanalizar (None = todo el archivo)
+            partes: [(inicio, detecciones)] ya analizados que se suman
+
+        Returns:
+            dict: Resultados con los fragmentos recuperados, o None
+        """
+        if rangos is None:
+            tamano = os.path.getsize(filepath)
+            paso = max(self.bytes_minimos_reintento, tamano // 8)
+            if self.limite_bytes_archivo:
+                paso = min(paso, self.limite_bytes_archivo)
+            rangos = [(inicio, min(inicio + paso, tamano)) for inicio in range(0, tamano, paso)]
+
+        partes = list(partes)
+        descartados = []
+        pendientes = list(reversed(rangos))
+        while pendientes:
+            inicio, fin = pendientes.pop()
+            try:
+                partes.append((inicio, self._detectar_fragmento(filepath, inicio, fin)))
+            except PresupuestoExcedido:
+                if fin - inicio >= 2 * self.bytes_minimos_reintento:
+                    medio = (inicio + fin) // 2
+                    pendientes.extend([(medio, fin), (inicio, medio)])
+                else:
+                    descartados.append([inicio, fin])
+            except Exception:
+                descartados.append([inicio, fin])
+
+        problema['reintento'] = 'fragmentos'
+        problema['fragmentos_descartados'] = sorted(descartados)
+        problema['recuperado'] = bool(partes)
+        if not partes:
+            return None
+        partes.sort(key=lambda parte: parte[0])
+        return self.construir_resultado(
+            filepath, self.combinar_detecciones([detecciones for _, detecciones in partes]))
+
+    def _unir_fragmentos(self, filepath, fragmentos):
+        """
+        Resultado de un archivo que el pool ha analizado en fragmentos
+
+        Si algún fragmento ha fallado, el archivo sigue el mismo camino que
+        en analizar_archivo: una sola entrada en problemas (con los rangos
+        fallidos en 'fragmentos') y, si el fallo es de presupuesto y se ha
+        activado self.reintentar_por_fragmentos, se reanalizan en este
+        proceso solo los fragmentos fallidos.
+
+        Args:
+            fragmentos: [(tarea, detecciones, fallo)] en orden; fallo es la
+                        entrada de _describir_problema() o None
+
+        Returns:
+            tuple: (resultado o None, problema o None)
+        """
+        fallidos = [(tarea, fallo) for tarea, _, fallo in fragmentos if fallo is not None]
+        if not fallidos:
+            return self.construir_resultado(filepath, self.combinar_detecciones(
+                [detecciones for _, detecciones, _ in fragmentos])), None
+
+        rangos = [(tarea['inicio'], tarea['fin']) for tarea, _ in fallidos]
+        problema = dict(fallidos[0][1], fragmentos=[list(rango) for rango in rangos])
+        if problema['motivo'] == 'error':
+            print(f"❌ Error analizando {filepath}: {problema['detalle']}")
+            return None, problema
+        print(f"⏱️  En cuarentena {filepath}: {problema['detalle']}")
+        if not self.reintentar_por_fragmentos:
+            return None, problema
+        correctos = [(tarea['inicio'], detecciones)
+                     for tarea, detecciones, fallo in fragmentos if fallo is None]
+        return self._reintentar_por_fragmentos(filepath, problema, rangos, correctos), problema
+
+    # =====================================================================
+    # LÍMITES POR ARCHIVO (vigilante)
+    # =====================================================================
+
+    @contextmanager
+    def _vigilar(self):
+        """
+        Activa los límites de tiempo y coincidencias mientras se analiza un
+        archivo o fragmento
+
+        Los detectores comprueban el presupuesto entre término y término;
+        además, en Unix una alarma (SIGALRM) interrumpe el análisis cuando
+        se agota el tiempo aunque ninguna comprobación llegue a ejecutarse.
+        """
+        limite = self.limite_segundos_archivo
+        self._presupuesto = {
+            'fin': time.perf_counter() + limite if limite else None,
+            'coincidencias': 0
+        }
+        alarma = (limite and hasattr(signal, 'setitimer')
+                  and threading.current_thread() is threading.main_thread())
+        if alarma:
+            anterior = signal.signal(signal.SIGALRM, self._alarma_vigilante)
+            signal.setitimer(signal.ITIMER_REAL, limite)
+        try:
+            yield
+        finally:
+            if alarma:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+                signal.signal(signal.SIGALRM, anterior)
+            self._presupuesto = None
+
+    def _alarma_vigilante(self, signum, frame):
+        raise PresupuestoExcedido('tiempo', self._etapa_actual, 'vigilante')
+
+    def _comprobar_presupuesto(self, coincidencias=0, etapa=None):
+        """Registra la etapa y coincidencias actuales y aplica los límites"""
+        if etapa is not None:
+            self._etapa_actual = etapa
+        presupuesto = self._presupuesto
+        if presupuesto is None:
+            return
+
+        presupuesto['coincidencias'] += coincidencias
+        if (self.limite_coincidencias_archivo
+                and presupuesto['coincidencias'] > self.limite_coincidencias_archivo):
+            raise PresupuestoExcedido('coincidencias', self._etapa_actual,
+                                      f"{presupuesto['coincidencias']:,} coincidencias")
+        if presupuesto['fin'] is not None and time.perf_counter() > presupuesto['fin']:
+            raise PresupuestoExcedido('tiempo', self._etapa_actual,
+                                      f"{self.limite_segundos_archivo} s")
+
+    def _registrar_problema(self, filepath, error, **detalles):
+        """Añade un archivo a la lista de problemas (cuarentena)"""
+        problema = self._describir_problema(filepath, error, **detalles)
+        self.problemas.append(problema)
+        return problema
+
+    def _describir_problema(self, filepath, error, **detalles):
+        """Entrada de la lista de problemas para un error, sin registrarla"""
+        problema = {
+            'archivo': os.path.basename(filepath),
+            'ruta': filepath,
+            'motivo': getattr(error, 'motivo', 'error'),
+            'etapa': getattr(error, 'etapa', self._etapa_actual),
+            'detalle': str(error)
+        }
+        problema.update(detalles)
+        return problema
+
+    def _alinear_corte(self, f, posicion, ventana=1 << 20):
+        """Desplaza un punto de corte hasta después del siguiente separador"""
+        if posicion <= 0:
+            return 0
+
+        f.seek(posicion)
+        bloque = f.read(ventana)
+        for separador in (b'\n\n', b'\n', b' '):
+            indice = bloque.find(separador)
+            if indice >= 0:
+                return posicion + indice + 1
+
+        # Sin separadores: al menos no partir un carácter UTF-8
+        indice = 0
+        while indice < len(bloque) and (bloque[indice] & 0xC0) == 0x80:
+            indice += 1
+        return posicion + indice
+
+    # =====================================================================
+    # PLANIFICACIÓN Y EJECUCIÓN EN PARALELO
+    # =====================================================================
+
+    def descubrir_archivos(self, directorio):
+        """
+        Recorre el directorio y construye el manifiesto de archivos TXT
+
+        Returns:
+            list: Tuplas (ruta, bytes) en el orden de os.walk
+        """
+        manifiesto = []
+        for root, dirs, files in os.walk(directorio):
+            for file in files:
+                if file.endswith('.txt'):
+                    ruta = os.path.join(root, file)
+                    try:
+                        tamano = os.path.getsize(ruta)
+                    except OSError:
+                        tamano = 0
+                    manifiesto.append((ruta, tamano))
+        return manifiesto
+
+    def planificar_tareas(self, manifiesto, procesos):
+        """
+        Reparte el manifiesto en tareas equilibradas para el pool
+
+        - Los archivos se despachan de mayor a menor tamaño, para que los
+          grandes no queden para el final (rezagados).
+        - Los archivos mucho mayores que la carga media de un proceso se
+          dividen en fragmentos cuyas detecciones se suman después. Los
+          que superan self.limite_bytes_archivo no se dividen: van solos a
+          analizar_archivo, que los pone en cuarentena igual que en una
+          ejecución secuencial.
+        - Los archivos pequeños se agrupan en lotes cuyo tamaño decrece a
+          medida que queda menos trabajo (planificación guiada).
+
+        Returns:
+            list: Tareas ({'tipo': 'archivos' | 'fragmento', ...})
+        """
+        if procesos <= 1:
+            return [{'tipo': 'archivos', 'rutas': [ruta]} for ruta, _ in manifiesto]
+
+        total_bytes = sum(tamano for _, tamano in manifiesto)
+        objetivo = max(self.bytes_minimos_fragmento, total_bytes // (procesos * 4))
+
+        tareas = []
+        pequenos = []
+        for ruta, tamano in sorted(manifiesto, key=lambda x: x[1], reverse=True):
+            if self.limite_bytes_archivo and tamano > self.limite_bytes_archivo:
+                tareas.append({'tipo': 'archivos', 'rutas': [ruta]})
+            elif tamano > 2 * objetivo:
+                partes = -(-tamano // objetivo)
+                for i in range(partes):
+                    tareas.append({
+                        'tipo': 'fragmento',
+                        'ruta': ruta,
+                        'inicio': tamano * i // partes,
+                        'fin': tamano * (i + 1) // partes,
+                        'indice': i,
+                        'partes': partes
+                    })
+            else:
+                pequenos.append((ruta, tamano))
+
+        restante = sum(tamano for _, tamano in pequenos)
+        lote, bytes_lote = [], 0
+        for ruta, tamano in pequenos:
+            lote.append(ruta)
+            bytes_lote += tamano
+            restante -= tamano
+            limite = max(1, (restante + bytes_lote) // (procesos * 2))
+            if bytes_lote >= limite or len(lote) >= self.archivos_maximos_lote:
+                tareas.append({'tipo': 'archivos', 'rutas': lote})
+                lote, bytes_lote = [], 0
+        if lote:
+            tareas.append({'tipo': 'archivos', 'rutas': lote})
+
+        return tareas
+
+    def ejecutar_tarea(self, tarea):
+        """
+        Ejecuta una tarea planificada (en el proceso actual)
+
+        Un fragmento que falla no se registra aquí como problema: su
+        descripción va en 'fallo' y el proceso principal decide, con todos
+        los fragmentos del archivo, qué hacer (ver _unir_fragmentos).
+
+        Returns:
+            dict: {'tarea', 'salidas': [(ruta, resultado)], 'problemas',
+                   'fallo', 'segundos_etapas', 'pid', 'segundos',
+                   'segundos_cpu'}
+        """
+        inicio = time.perf_counter()
+        inicio_cpu = time.process_time()
+        self.problemas = []
+        self.segundos_etapas = Counter()
+        fallo = None
+        if tarea['tipo'] == 'fragmento':
+            try:
+                detecciones = self._detectar_fragmento(
+                    tarea['ruta'], tarea['inicio'], tarea['fin'])
+            except Exception as e:
+                detecciones = None
+                fallo = self._describir_problema(tarea['ruta'], e)
+            salidas = [(tarea['ruta'], detecciones)]
+        else:
+            salidas = [(ruta, self.analizar_archivo(ruta)) for ruta in tarea['rutas']]
+
+        return {
+            'tarea': tarea,
+            'salidas': salidas,
+            'problemas': self.problemas,
+            'fallo': fallo,
+            'segundos_etapas': dict(self.segundos_etapas),
+            'pid': os.getpid(),
+            'segundos': time.perf_counter() - inicio,
+            'segundos_cpu': time.process_time() - inicio_cpu
+        }
+
+    def crear_pool(self, procesos):
+        """Crea un pool de procesos con una copia de este detector en cada uno"""
+        if self.compartir_lexicos:
+            # Con 'spawn' los trabajadores no heredan los léxicos del proceso
+            # principal (fork los copia en cuanto el recolector los toca)
+            return multiprocessing.get_context('spawn').Pool(
+                procesos, initializer=_inicializar_trabajador,
+                initargs=(self.preparar_lexicos_compartidos(),))
+        return multiprocessing.Pool(procesos, initializer=_inicializar_trabajador,
+                                    initargs=(self,))
+
+    def cerrar_pool(self, pool):
+        """Espera a que termine el pool y libera las tablas compartidas"""
+        pool.close()
+        pool.join()
+        if self._tablas_compartidas is not None:
+            self._tablas_compartidas.liberar()
+            self._tablas_compartidas = None
+
+    def preparar_lexicos_compartidos(self):
+        """
+        Copia del detector para los trabajadores con los léxicos de nombres
+        (y el índice aproximado, si se usa) en TablasCompartidas
+
+        Las tablas se escriben una sola vez en un archivo mapeado en
+        memoria; cada trabajador recibe solo su ruta y consulta las mismas
+        páginas físicas, así la memoria de los léxicos no se multiplica por
+        el número de procesos. Las expresiones compiladas no se pueden
+        compartir y cada trabajador compila las suyas.
+
+        Returns:
+            DetectorGeneroMusical: Copia con los léxicos de solo lectura
+        """
+        mapas = {
+            'nombres_masculinos': dict.fromkeys(self.nombres_masculinos, ()),
+            'nombres_femeninos': dict.fromkeys(self.nombres_femeninos, ())
+        }
+        etiquetas = None
+        if self.coincidencia_difusa:
+            etiquetas, tablas_difusas = self.obtener_indice_difuso().exportar_tablas()
+            mapas.update(tablas_difusas)
+        tablas = TablasCompartidas.crear(mapas, self.ruta_tablas_compartidas)
+        self._tablas_compartidas = tablas
+
+        copia = copy.copy(self)
+        copia.resultados = {}
+        copia.nombres_masculinos = tablas['nombres_masculinos']
+        copia.nombres_femeninos = tablas['nombres_femeninos']
+        copia._indice_difuso = (IndiceDifusoCompartido(tablas, etiquetas, self.distancia_difusa)
+                                if self.coincidencia_difusa else None)
+        copia._tablas_compartidas = None
+        copia._motor_combinado = None
+        copia._terminos_combinados = None
+        if not self.silencioso:
+            print(f"🧠 Léxicos compartidos entre procesos: {tablas.ruta} "
+                  f"({tablas.tamano() / 1024:,.0f} KB)")
+        return copia
+
+    def ejecutar_planificado(self, manifiesto, procesos=1, pool=None, al_completar=None):
+        """
+        Analiza los archivos del manifiesto, en paralelo si procesos > 1
+
+        La eficiencia de balanceo es el tiempo de CPU de todas las tareas
+        dividido por (núcleos usables × duración), con núcleos usables =
+        min(procesos, núcleos disponibles): la fracción de la capacidad de
+        cómputo que estuvo ocupada. Se mide con process_time() y no con el
+        tiempo de reloj de cada tarea, que crece cuando los procesos
+        comparten núcleo y daría casi 1.0 aunque hubiera núcleos
+        ociosos. El tiempo esperando al disco no cuenta como ocupado, y
+        tampoco el trabajo del proceso principal (reintentos de
+        fragmentos).
+
+        Args:
+            pool: Pool ya creado con crear_pool() (si None, se crea uno)
+            al_completar: Función llamada con cada resultado según llega
+
+        Returns:
+            tuple: (resultados en el orden del manifiesto, metadatos de
+                    planificación con la eficiencia de balanceo de carga,
+                    problemas/cuarentena)
+        """
+        procesos = max(1, procesos)
+        tareas = self.planificar_tareas(manifiesto, procesos)
+        orden = {ruta: i for i, (ruta, _) in enumerate(manifiesto)}
+
+        resultados = {}
+        problemas = []
+        fragmentos = defaultdict(dict)
+        ocupacion = 0.0
+        inicio = time.perf_counter()
+        tamanos = dict(manifiesto)
+        progreso = ReporteProgreso(len(manifiesto), sum(tamanos.values()),
+                                   silencioso=self.silencioso,
+                                   intervalo=self.intervalo_progreso,
+                                   ruta_metricas=self.ruta_metricas)
+
+        pool_propio = None
+        if procesos > 1:
+            if pool is None:
+                pool = pool_propio = self.crear_pool(procesos)
+            salidas_tareas = pool.imap_unordered(_ejecutar_tarea, tareas)
+        else:
+            salidas_tareas = map(self.ejecutar_tarea, tareas)
+
+        try:
+            for salida in salidas_tareas:
+                ocupacion += salida['segundos_cpu']
+                problemas.extend(salida['problemas'])
+                tarea = salida['tarea']
+                if tarea['tipo'] == 'fragmento':
+                    bytes_leidos = tarea['fin'] - tarea['inicio']
+                else:
+                    bytes_leidos = sum(tamanos[ruta] for ruta in tarea['rutas'])
+                progreso.actualizar(bytes_leidos=bytes_leidos,
+                                    errores=len(salida['problemas']),
+                                    segundos_etapas=salida['segundos_etapas'])
+
+                if tarea['tipo'] == 'fragmento':
+                    ruta, detecciones = salida['salidas'][0]
+                    partes = fragmentos[ruta]
+                    partes[tarea['indice']] = (tarea, detecciones, salida['fallo'])
+                    if len(partes) < tarea['partes']:
+                        continue
+                    del fragmentos[ruta]
+                    resultado, problema = self._unir_fragmentos(
+                        ruta, [partes[i] for i in range(tarea['partes'])])
+                    if problema is not None:
+                        problemas.append(problema)
+                        progreso.actualizar(errores=1)
+                    salidas_archivo = [(ruta, resultado)]
+                else:
+                    salidas_archivo = salida['salidas']
+
+                for ruta, resultado in salidas_archivo:
+                    menciones = None
+                    if resultado:
+                        resultados[ruta] = resultado
+                        menciones = {
+                            'masculino': resultado['totales']['menciones_masculinas'],
+                            'femenino': resultado['totales']['menciones_femeninas']
+                        }
+                        if al_completar is not None:
+                            al_completar(resultado)
+                    progreso.actualizar(archivos=1, menciones=menciones)
+            progreso.finalizar()
+        finally:
+            if pool_propio is not None:
+                self.cerrar_pool(pool_propio)
+
+        duracion = time.perf_counter() - inicio
+        nucleos = min(procesos, _nucleos_disponibles())
+        planificacion = {
+            'procesos': procesos,
+            'nucleos': nucleos,
+            'tareas': len(tareas),
+            'archivos_divididos': len({t['ruta'] for t in tareas if t['tipo'] == 'fragmento'}),
+            'fragmentos': sum(1 for t in tareas if t['tipo'] == 'fragmento'),
+            'segundos': round(duracion, 3),
+            'eficiencia_balanceo': round(
+                ocupacion / (nucleos * duracion), 4) if duracion > 0 else 1.0
+        }
+
+        ordenados = sorted(resultados.values(), key=lambda r: orden[r['ruta']])
+        problemas.sort(key=lambda p: orden[p['ruta']])
+        return ordenados, planificacion, problemas
+
+    # =====================================================================
+    # DUPLICADOS APROXIMADOS (MinHash + LSH)
+    # =====================================================================
+
+    def calcular_huella(self, filepath):
+        """
+        Calcula la huella MinHash de un documento en una lectura en streaming
+
+        Usa "one-permutation hashing": cada 5-grama de palabras se reparte
+        en uno de los bins según su hash y cada bin guarda el mínimo. Los
+        bins vacíos se rellenan con el siguiente bin ocupado (densificación).
+
+        Returns:
+            tuple: Un entero por bin, o None si el texto es demasiado corto
+        """
+        bins = self.bins_minhash
+        n = self.palabras_por_shingle
+        mascara = (1 << 64) - 1
+        base = 0x100000001B3
+        base_saliente = pow(base, n - 1, 1 << 64)
+        vacio = 1 << 64
+        minimos = [vacio] * bins
+        ventana = deque()
+        h = 0
+
+        try:
+            with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
+                for linea in f:
+                    for palabra in _PATRON_PALABRA.findall(linea.lower()):
+                        x = zlib.crc32(palabra.encode('utf-8'))
+                        if len(ventana) == n:
+                            h = (h - ventana.popleft() * base_saliente) & mascara
+                        ventana.append(x)
+                        h = (h * base + x) & mascara
+                        if len(ventana) < n:
+                            continue
+
+                        # Mezcla final (splitmix64) para repartir bien los bits
+                        z = h ^ (h >> 30)
+                        z = (z * 0xBF58476D1CE4E5B9) & mascara
+                        z ^= z >> 27
+                        z = (z * 0x94D049BB133111EB) & mascara
+                        z ^= z >> 31
+                        indice, valor = z % bins, z // bins
+                        if valor < minimos[indice]:
+                            minimos[indice] = valor
+        except OSError:
+            return None
+
+        ocupados = [i for i, v in enumerate(minimos) if v != vacio]
+        if not ocupados:
+            return None
+
+        huella = list(minimos)
+        for i in range(bins):
+            if huella[i] == vacio:
+                distancia = 1
+                while minimos[(i + distancia) % bins] == vacio:
+                    distancia += 1
+                huella[i] = minimos[(i + distancia) % bins] + distancia * vacio
+        return tuple(huella)
+
+    def similitud_huellas(self, huella_a, huella_b):
+        """Estima la similitud de Jaccard entre dos huellas MinHash"""
+        iguales = sum(1 for a, b in zip(huella_a, huella_b) if a == b)
+        return iguales / len(huella_a)
+
+    def buscar_duplicados(self, manifiesto, procesos=1, pool=None):
+        """
+        Agrupa los documentos casi idénticos (reimpresiones de avisos,
+        programas de concierto, anuncios...)
+
+        Las huellas se dividen en bandas (LSH): dos documentos son candidatos
+        si coinciden en alguna banda, y se agrupan si su similitud estimada
+        supera self.umbral_duplicados.
+
+        Returns:
+            list: Grupos (listas de rutas) de 2 o más documentos; el primero
+                  de cada grupo, en orden del manifiesto, es el representante
+        """
+        rutas = [ruta for ruta, _ in manifiesto]
+        if procesos > 1 and pool is not None:
+            huellas = pool.map(_calcular_huella, rutas,
+                               chunksize=max(1, len(rutas) // (procesos * 8)))
+        else:
+            huellas = [self.calcular_huella(ruta) for ruta in rutas]
+
+        padre = list(range(len(rutas)))
+
+        def raiz(i):
+            while padre[i] != i:
+                padre[i] = padre[padre[i]]
+                i = padre[i]
+            return i
+
+        filas = self.bins_minhash // self.bandas_lsh
+        for banda in range(self.bandas_lsh):
+            cubetas = {}
+            for i, huella in enumerate(huellas):
+                if huella is None:
+                    continue
+                primero = cubetas.setdefault(huella[banda * filas:(banda + 1) * filas], i)
+                if primero == i:
+                    continue
+                a, b = raiz(primero), raiz(i)
+                if a != b and self.similitud_huellas(huellas[primero], huella) >= self.umbral_duplicados:
+                    padre[max(a, b)] = min(a, b)
+
+        grupos = defaultdict(list)
+        for i, ruta in enumerate(rutas):
+            grupos[raiz(i)].append(ruta)
+
+        return [grupo for _, grupo in sorted(grupos.items()) if len(grupo) > 1]
+
+    def analizar_directorio(self, directorio=None, procesos=1, almacen=None):
+        """
+        Analiza todos los archivos TXT en un directorio
+
+        Args:
+            directorio (str): Ruta al directorio (usa base_directory si None)
+            procesos (int): Número de procesos en paralelo (1 = secuencial)
+            almacen (AlmacenSQLite): Si se indica, los resultados se guardan
+                                     también en SQLite a medida que llegan
+        """
+        if directorio is None:
+            directorio = self.base_directory
+
+        if almacen is not None:
+            almacen.iniciar_ejecucion(directorio, self.parametros_ejecucion(procesos))
+
+        pool = self.crear_pool(procesos) if procesos > 1 else None
+        try:
+            manifiesto, grupos_duplicados = self.preparar_manifiesto(directorio, procesos, pool)
+
+            # Analizar cada archivo
+            resultados_archivos, planificacion, problemas = self.ejecutar_planificado(
+                manifiesto, procesos, pool,
+                almacen.agregar_resultado if almacen is not None else None)
+        finally:
+            if pool is not None:
+                self.cerrar_pool(pool)
+
+        self.resultados = self.consolidar_resultados(
+            directorio, resultados_archivos, planificacion, problemas, grupos_duplicados)
+
+        if almacen is not None:
+            almacen.finalizar_ejecucion(self.resultados)
+            self.resultados['metadata']['ejecucion_sqlite'] = almacen.ejecucion_id
+            print(f"🗄️  Ejecución {almacen.ejecucion_id} guardada en: {almacen.ruta_db}")
+
+        return self.resultados
+
+    def preparar_manifiesto(self, directorio, procesos=1, pool=None):
+        """
+        Descubre los archivos de un directorio y, si se ha activado
+        self.detectar_duplicados, deja un representante por grupo
+
+        Returns:
+            tuple: (manifiesto a analizar, grupos de duplicados)
+        """
+        print(f"📂 Analizando directorio: {directorio}")
+
+        manifiesto = self.descubrir_archivos(directorio)
+
+        print(f"📄 Encontrados {len(manifiesto)} archivos TXT")
+
+        # Agrupar reimpresiones y analizar solo un representante por grupo
+        grupos_duplicados = []
+        if self.detectar_duplicados:
+            grupos_duplicados = self.buscar_duplicados(manifiesto, procesos, pool)
+            omitidos = {ruta for grupo in grupos_duplicados for ruta in grupo[1:]}
+            manifiesto = [(ruta, tamano) for ruta, tamano in manifiesto
+                          if ruta not in omitidos]
+            print(f"🔁 {len(omitidos)} duplicados aproximados en "
+                  f"{len(grupos_duplicados)} grupos (se analiza un representante por grupo)")
+
+        return manifiesto, grupos_duplicados
+
+    def consolidar_resultados(self, directorio, resultados_archivos, planificacion,
+                              problemas, grupos_duplicados=()):
+        """
+        Reúne los resultados de los archivos de un directorio en la
+        estructura del JSON (metadata, resumen_general, archivos...)
+
+        Returns:
+            dict: Resultados consolidados
+        """
+        total_masc = sum(r['totales']['menciones_masculinas'] for r in resultados_archivos)
+        total_fem = sum(r['totales']['menciones_femeninas'] for r in resultados_archivos)
+        total_palabras = sum(r['palabras'] for r in resultados_archivos)
+
+        # Cada duplicado cuenta como una copia de su representante, con su peso
+        por_ruta = {r['ruta']: r for r in resultados_archivos}
+        copias_por_ruta = {}
+        for grupo in grupos_duplicados:
+            representante = por_ruta.get(grupo[0])
+            if representante:
+                copias = self.peso_duplicados * (len(grupo) - 1)
+                copias_por_ruta[grupo[0]] = copias
+                total_masc += copias * representante['totales']['menciones_masculinas']
+                total_fem += copias * representante['totales']['menciones_femeninas']
+        total_masc = self._redondear_total(total_masc)
+        total_fem = self._redondear_total(total_fem)
+        pesos = [1 + copias_por_ruta.get(r['ruta'], 0) for r in resultados_archivos]
+
+        # Incertidumbre del ratio: bootstrap remuestreando archivos
+        semilla = self.semilla_bootstrap
+        if semilla is None:
+            semilla = random.randrange(1 << 32)
+        intervalo = intervalo_bootstrap(
+            [r['totales']['menciones_masculinas'] for r in resultados_archivos],
+            [r['totales']['menciones_femeninas'] for r in resultados_archivos],
+            pesos, self.remuestreos_bootstrap, self.confianza_bootstrap, semilla)
+
+        # Consolidar resultados
+        resultados = {
+            'metadata': {
+                'directorio': directorio,
+                'total_archivos': len(resultados_archivos),
+                'total_palabras': total_palabras,
+                'fecha_analisis': datetime.now().isoformat(),
+                'planificacion': planificacion
+            },
+            'resumen_general': {
+                'menciones_masculinas_total': total_masc,
+                'menciones_femeninas_total': total_fem,
+                'ratio_sesgo_general': self.calcular_ratio_genero(total_masc, total_fem),
+                'porcentaje_masculino': round(
+                    (total_masc / (total_masc + total_fem) * 100)
+                    if (total_masc + total_fem) > 0 else 0, 2
+                ),
+                'porcentaje_femenino': round(
+                    (total_fem / (total_masc + total_fem) * 100)
+                    if (total_masc + total_fem) > 0 else 0, 2
+                )
+            },
+            'desglose': self.desglosar_resultados(directorio, resultados_archivos, pesos, semilla),
+            'archivos': resultados_archivos,
+            'problemas': problemas
+        }
+        if intervalo:
+            resultados['resumen_general']['intervalo_confianza'] = intervalo
+
+        if problemas:
+            print(f"⚠️  {len(problemas)} problemas registrados (ver 'problemas' en el JSON)")
+
+        if self.analizar_coocurrencias:
+            coocurrencias = Counter()
+            for resultado in resultados_archivos:
+                for genero, personas in resultado['detecciones']['coocurrencias'].items():
+                    for persona, profesiones in personas.items():
+                        for profesion, n in profesiones.items():
+                            coocurrencias[(genero, persona, profesion)] += n
+            resultados['coocurrencias'] = self.anidar_coocurrencias(coocurrencias)
+
+        if self.detectores_registrados:
+            adicionales = {detector.seccion: defaultdict(Counter)
+                           for detector in self.detectores_registrados}
+            for resultado in resultados_archivos:
+                for seccion, categorias in resultado['detecciones']['adicionales'].items():
+                    for categoria, conteo in categorias.items():
+                        adicionales[seccion][categoria].update(conteo)
+            resultados['adicionales'] = {
+                seccion: {categoria: dict(conteo.most_common())
+                          for categoria, conteo in sorted(categorias.items())}
+                for seccion, categorias in adicionales.items()
+            }
+
+        if self.segmentar:
+            resultados['metadata']['total_segmentos'] = sum(
+                len(resultado.get('segmentos', [])) for resultado in resultados_archivos)
+
+        if self.detectar_duplicados:
+            resultados['duplicados'] = {
+                'umbral_similitud': self.umbral_duplicados,
+                'peso': self.peso_duplicados,
+                'archivos_omitidos': sum(len(g) - 1 for g in grupos_duplicados),
+                'grupos': [{'representante': g[0], 'duplicados': g[1:]}
+                           for g in grupos_duplicados]
+            }
+
+        return resultados
+
+    def desglosar_resultados(self, directorio, resultados_archivos, pesos=None, semilla=None):
+        """
+        Totales e intervalos de confianza por publicación y por año
+
+        La publicación es el primer subdirectorio de la ruta (o el propio
+        directorio si los archivos están en la raíz); el año, el primer
+        número de cuatro cifras entre 1500 y 2099 del nombre del archivo
+        ("1925_05_23_ONDAS.txt").
+
+        Returns:
+            dict: {'publicaciones': {nombre: totales}, 'periodos': {año: totales}}
+        """
+        if pesos is None:
+            pesos = [1.0] * len(resultados_archivos)
+
+        grupos = {'publicaciones': defaultdict(list), 'periodos': defaultdict(list)}
+        for i, resultado in enumerate(resultados_archivos):
+            grupos['publicaciones'][self.publicacion_archivo(resultado['ruta'], directorio)].append(i)
+            grupos['periodos'][self.anio_archivo(resultado['ruta'])].append(i)
+
+        desglose = {}
+        for tipo, indices_grupos in grupos.items():
+            desglose[tipo] = {}
+            for clave in sorted(indices_grupos):
+                indices = indices_grupos[clave]
+                masculinas = [resultados_archivos[i]['totales']['menciones_masculinas'] for i in indices]
+                femeninas = [resultados_archivos[i]['totales']['menciones_femeninas'] for i in indices]
+                pesos_grupo = [pesos[i] for i in indices]
+                total_masc = self._redondear_total(sum(m * p for m, p in zip(masculinas, pesos_grupo)))
+                total_fem = self._redondear_total(sum(f * p for f, p in zip(femeninas, pesos_grupo)))
+                entrada = {
+                    'archivos': len(indices),
+                    'menciones_masculinas': total_masc,
+                    'menciones_femeninas': total_fem,
+                    'ratio_sesgo': self.calcular_ratio_genero(total_masc, total_fem)
+                }
+                intervalo = intervalo_bootstrap(masculinas, femeninas, pesos_grupo,
+                                                self.remuestreos_bootstrap,
+                                                self.confianza_bootstrap, semilla)
+                if intervalo:
+                    entrada['intervalo_confianza'] = intervalo
+                desglose[tipo][clave] = entrada
+        return desglose
+
+    def publicacion_archivo(self, ruta, directorio):
+        """Primer subdirectorio de la ruta (o el propio directorio si está en la raíz)"""
+        partes = os.path.relpath(ruta, directorio).split(os.sep)
+        return partes[0] if len(partes) > 1 else os.path.basename(os.path.normpath(directorio))
+
+    def anio_archivo(self, ruta):
+        """Año del nombre del archivo ("1925_05_23_ONDAS.txt" -> "1925") o 'sin fecha'"""
+        anio = _PATRON_ANIO.search(os.path.basename(ruta))
+        return anio.group(0) if anio else 'sin fecha'
+
+    def parametros_ejecucion(self, procesos=1):
+        """Opciones de la ejecución que influyen en los conteos"""
+        return {
+            'procesos': procesos,
+            'motor_deteccion': self.motor_deteccion,
+            'detectar_duplicados': self.detectar_duplicados,
+            'umbral_duplicados': self.umbral_duplicados,
+            'peso_duplicados': self.peso_duplicados,
+            'coincidencia_difusa': self.coincidencia_difusa,
+            'distancia_difusa': self.distancia_difusa,
+            'analizar_coocurrencias': self.analizar_coocurrencias,
+            'segmentar': self.segmentar,
+            'desambiguar_profesiones': self.desambiguar_profesiones,
+            'detectores_adicionales': [d.seccion for d in self.detectores_registrados],
+            'nombres_masculinos': len(self.nombres_masculinos),
+            'nombres_femeninos': len(self.nombres_femeninos),
+            'profesiones_masculinas': len(self.profesiones_masculinas),
+            'profesiones_femeninas': len(self.profesiones_femeninas)
+        }
+
+    def _redondear_total(self, total):
+        """Mantiene enteros los totales salvo cuando hay pesos fraccionarios"""
+        return int(total) if float(total).is_integer() else round(total, 2)
+
+    # =====================================================================
+    # VARIOS CORPUS EN UNA EJECUCIÓN
+    # =====================================================================
+
+    def analizar_corpus(self, corpus, procesos=1):
+        """
+        Analiza varios corpus en una sola ejecución con un único pool
+
+        Los archivos de todos los corpus se planifican juntos (los más
+        grandes primero), así que los corpus no esperan uno detrás de otro
+        y comparten los núcleos y el detector ya cargado en cada trabajador.
+        Un archivo presente en dos corpus se analiza una sola vez.
+
+        Args:
+            corpus (list): Pares (etiqueta, directorio)
+            procesos (int): Número de procesos en paralelo (1 = secuencial)
+
+        Returns:
+            dict: {'metadata', 'comparacion' (totales por corpus),
+                   'corpus': {etiqueta: resultados de ese corpus}}
+        """
+        manifiestos = {}
+        grupos_duplicados = {}
+        pool = self.crear_pool(procesos) if procesos > 1 else None
+        try:
+            for etiqueta, directorio in corpus:
+                manifiestos[etiqueta], grupos_duplicados[etiqueta] = self.preparar_manifiesto(
+                    directorio, procesos, pool)
+            conjunto = list(dict(
+                par for etiqueta, _ in corpus for par in manifiestos[etiqueta]).items())
+
+            print(f"📚 {len(corpus)} corpus, {len(conjunto)} archivos en una sola ejecución")
+            resultados_archivos, planificacion, problemas = self.ejecutar_planificado(
+                conjunto, procesos, pool)
+        finally:
+            if pool is not None:
+                self.cerrar_pool(pool)
+
+        por_ruta = {r['ruta']: r for r in resultados_archivos}
+        comparativa = {
+            'metadata': {
+                'corpus': [{'etiqueta': etiqueta, 'directorio': directorio}
+                           for etiqueta, directorio in corpus],
+                'total_archivos': len(resultados_archivos),
+                'fecha_analisis': datetime.now().isoformat(),
+                'parametros': self.parametros_ejecucion(procesos),
+                'planificacion': planificacion
+            },
+            'comparacion': [],
+            'corpus': {}
+        }
+        for etiqueta, directorio in corpus:
+            rutas = [ruta for ruta, _ in manifiestos[etiqueta]]
+            incluidas = set(rutas)
+            resultados = self.consolidar_resultados(
+                directorio,
+                [por_ruta[ruta] for ruta in rutas if ruta in por_ruta],
+                planificacion,
+                [problema for problema in problemas if problema['ruta'] in incluidas],
+                grupos_duplicados[etiqueta])
+            comparativa['corpus'][etiqueta] = resultados
+            comparativa['comparacion'].append(self.resumir_corpus(etiqueta, resultados))
+
+        self.resultados = comparativa
+        return comparativa
+
+    def resumir_corpus(self, etiqueta, resultados, maximo_terminos=10):
+        """
+        Totales de un corpus para la tabla comparativa
+
+        Returns:
+            dict: Archivos, palabras, menciones, ratio, menciones por cada
+                  10.000 palabras y nombres/profesiones más frecuentes
+        """
+        meta = resultados['metadata']
+        resumen = resultados['resumen_general']
+        terminos = defaultdict(Counter)
+        for archivo in resultados['archivos']:
+            for categoria, genero, termino, n in celdas_conteo(archivo):
+                if categoria in ('nombres', 'profesiones'):
+                    terminos[(categoria, genero)][termino] += n
+
+        palabras = meta['total_palabras']
+        masculinas = resumen['menciones_masculinas_total']
+        femeninas = resumen['menciones_femeninas_total']
+        return {
+            'etiqueta': etiqueta,
+            'directorio': meta['directorio'],
+            'archivos': meta['total_archivos'],
+            'palabras': palabras,
+            'menciones_masculinas': masculinas,
+            'menciones_femeninas': femeninas,
+            'ratio_sesgo': resumen['ratio_sesgo_general'],
+            'intervalo_confianza': resumen.get('intervalo_confianza'),
+            'porcentaje_femenino': resumen['porcentaje_femenino'],
+            'masculinas_por_10000_palabras': round(masculinas * 10000 / palabras, 2) if palabras else 0.0,
+            'femeninas_por_10000_palabras': round(femeninas * 10000 / palabras, 2) if palabras else 0.0,
+            'problemas': len(resultados['problemas']),
+            'nombres_masculinos': terminos[('nombres', 'masculinos')].most_common(maximo_terminos),
+            'nombres_femeninos': terminos[('nombres', 'femeninos')].most_common(maximo_terminos),
+            'profesiones_masculinas': terminos[('profesiones', 'masculinas')].most_common(
+                maximo_terminos),
+            'profesiones_femeninas': terminos[('profesiones', 'femeninas')].most_common(
+                maximo_terminos)
+        }
+
+    # =====================================================================
+    # ESTIMACIÓN RÁPIDA POR MUESTREO
+    # =====================================================================
+
+    def estimar_directorio(self, directorio=None, procesos=1, anchura_objetivo=0.2):
+        """
+        Estima el ratio de sesgo leyendo una muestra estratificada de
+        archivos, hasta que el intervalo de confianza es suficientemente
+        estrecho
+
+        El orden de lectura intercala los estratos (self.estratos_muestra)
+        en proporción a su tamaño, así cualquier prefijo es una muestra
+        estratificada proporcional. Tras cada lote se calcula el ratio con
+        cada archivo pesado por N_h/n_h (archivos del estrato / leídos) y un
+        bootstrap dentro de cada estrato; la lectura para cuando la
+        anchura del intervalo es como mucho anchura_objetivo veces el
+        ratio estimado (0.2 = ±10%).
+
+        La detección de duplicados (self.detectar_duplicados) se ignora:
+        necesita la huella de todos los archivos, es decir, leer el corpus
+        entero.
+
+        Args:
+            directorio (str): Ruta al directorio (usa base_directory si None)
+            procesos (int): Número de procesos en paralelo (1 = secuencial)
+            anchura_objetivo (float): Anchura relativa del intervalo para parar
+
+        Returns:
+            dict: Estimación, intervalo, fracción del corpus leída y
+                  detalle por estrato
+        """
+        if np is None:
+            raise ImportError("La estimación por muestreo necesita NumPy (pip install numpy)")
+        if directorio is None:
+            directorio = self.base_directory
+        inicio = time.perf_counter()
+        semilla = self.semilla_bootstrap
+        if semilla is None:
+            semilla = random.randrange(1 << 32)
+
+        if self.detectar_duplicados:
+            print("⚠️  La estimación por muestreo no detecta duplicados "
+                  "(habría que leer todo el corpus): se omite --duplicados")
+
+        pool = self.crear_pool(procesos) if procesos > 1 else None
+        detectar_duplicados, self.detectar_duplicados = self.detectar_duplicados, False
+        try:
+            manifiesto, _ = self.preparar_manifiesto(directorio, procesos, pool)
+            estrato_de = self.estratos_manifiesto(manifiesto, directorio)
+            orden = self.orden_muestra(manifiesto, estrato_de, semilla)
+            tamanos = dict(manifiesto)
+            poblacion = Counter(estrato_de.values())
+
+            resultados = []
+            leidas = 0
+            estimacion = None
+            while leidas < len(orden):
+                lote = max(self.archivos_minimos_muestra,
+                           int(leidas * self.crecimiento_muestra))
+                siguientes = orden[leidas:leidas + lote]
+                leidas += len(siguientes)
+                # El progreso de cada lote se resume en una sola línea
+                silencioso, self.silencioso = self.silencioso, True
+                try:
+                    nuevos, _, _ = self.ejecutar_planificado(
+                        [(ruta, tamanos[ruta]) for ruta in siguientes], procesos, pool)
+                finally:
+                    self.silencioso = silencioso
+                resultados.extend(nuevos)
+
+                estimacion = self.estimar_ratio(resultados, estrato_de, poblacion, semilla)
+                anchura = estimacion['anchura_relativa'] if estimacion else None
+                print(f"🎯 {leidas:,} de {len(orden):,} archivos ({leidas / len(orden):.1%}) | "
+                      f"ratio {estimacion['ratio_sesgo'] if estimacion else '-'}:1 "
+                      f"{formatear_intervalo(estimacion and estimacion.get('intervalo_confianza'))}"
+                      + (f" | anchura {anchura:.0%}" if anchura is not None else ''))
+                if anchura is not None and anchura <= anchura_objetivo:
+                    break
+        finally:
+            self.detectar_duplicados = detectar_duplicados
+            if pool is not None:
+                self.cerrar_pool(pool)
+
+        bytes_total = sum(tamanos.values())
+        bytes_leidos = sum(tamanos[ruta] for ruta in orden[:leidas])
+        leidos_estrato = Counter(estrato_de[ruta] for ruta in orden[:leidas])
+        self.resultados = {
+            'metadata': {
+                'directorio': directorio,
+                'fecha_analisis': datetime.now().isoformat(),
+                'parametros': self.parametros_ejecucion(procesos),
+                'estratos': self.estratos_muestra,
+                'semilla': semilla,
+                'segundos': round(time.perf_counter() - inicio, 3)
+            },
+            'estimacion': dict(estimacion or {},
+                               anchura_objetivo=anchura_objetivo,
+                               objetivo_alcanzado=bool(
+                                   estimacion and estimacion['anchura_relativa'] is not None
+                                   and estimacion['anchura_relativa'] <= anchura_objetivo)),
+            'muestra': {
+                'archivos_total': len(orden),
+                'archivos_leidos': leidas,
+                'fraccion_archivos': round(leidas / len(orden), 4) if orden else 0.0,
+                'bytes_total': bytes_total,
+                'bytes_leidos': bytes_leidos,
+                'fraccion_bytes': round(bytes_leidos / bytes_total, 4) if bytes_total else 0.0,
+                'por_estrato': {clave: {'archivos': poblacion[clave],
+                                        'leidos': leidos_estrato[clave]}
+                                for clave in sorted(poblacion)}
+            }
+        }
+        return self.resultados
+
+    def estratos_manifiesto(self, manifiesto, directorio):
+        """
+        Estrato de cada archivo según self.estratos_muestra
+
+        Returns:
+            dict: {ruta: clave del estrato}
+        """
+        if self.estratos_muestra == 'publicacion':
+            return {ruta: self.publicacion_archivo(ruta, directorio) for ruta, _ in manifiesto}
+        if self.estratos_muestra == 'anio':
+            return {ruta: self.anio_archivo(ruta) for ruta, _ in manifiesto}
+        if self.estratos_muestra == 'tamano':
+            cortes = sorted(tamano for _, tamano in manifiesto)
+            cortes = [cortes[len(cortes) * q // 4] for q in (1, 2, 3)] if cortes else []
+            return {ruta: f"Q{1 + sum(tamano > corte for corte in cortes)}"
+                    for ruta, tamano in manifiesto}
+        raise ValueError(f"Estratos desconocidos: {self.estratos_muestra}")
+
+    def orden_muestra(self, manifiesto, estrato_de, semilla):
+        """
+        Orden de lectura aleatorio que intercala los estratos en proporción
+        a su tamaño: el archivo i (de N_h, barajados) de un estrato va en la
+        posición (i + u) / N_h, con u uniforme en [0, 1)
+
+        Returns:
+            list: Rutas en orden de lectura
+        """
+        rng = random.Random(semilla)
+        por_estrato = defaultdict(list)
+        for ruta, _ in sorted(manifiesto):
+            por_estrato[estrato_de[ruta]].append(ruta)
+        claves = []
+        for rutas in por_estrato.values():
+            rng.shuffle(rutas)
+            claves.extend(((i + rng.random()) / len(rutas), ruta) for i, ruta in enumerate(rutas))
+        return [ruta for _, ruta in sorted(claves)]
+
+    def estimar_ratio(self, resultados, estrato_de, poblacion, semilla=None):
+        """
+        Ratio estimado de la muestra leída: cada archivo pesa N_h/n_h y el
+        intervalo se calcula remuestreando dentro de cada estrato, con
+        corrección de población finita (los estratos con un solo archivo
+        leído, de varios, se remuestrean juntos)
+
+        Returns:
+            dict: Menciones estimadas, ratio, porcentaje femenino,
+                  intervalo y anchura relativa, o None sin resultados
+        """
+        if not resultados:
+            return None
+        leidos = Counter(estrato_de[r['ruta']] for r in resultados)
+        pesos = [poblacion[estrato_de[r['ruta']]] / leidos[estrato_de[r['ruta']]]
+                 for r in resultados]
+        # Los estratos con un archivo leído de varios no tienen varianza
+        # propia que estimar: se juntan en un solo estrato ('')
+        juntos = {clave for clave, n in leidos.items() if n == 1 and poblacion[clave] > 1}
+        estratos = ['' if estrato_de[r['ruta']] in juntos else estrato_de[r['ruta']]
+                    for r in resultados]
+        poblacion_estratos = {clave: poblacion[clave] for clave in leidos if clave not in juntos}
+        if juntos:
+            poblacion_estratos[''] = sum(poblacion[clave] for clave in juntos)
+        masculinas = [r['totales']['menciones_masculinas'] for r in resultados]
+        femeninas = [r['totales']['menciones_femeninas'] for r in resultados]
+
+        total_masc = round(sum(m * p for m, p in zip(masculinas, pesos)))
+        total_fem = round(sum(f * p for f, p in zip(femeninas, pesos)))
+        ratio = self.calcular_ratio_genero(total_masc, total_fem)
+        estimacion = {
+            'menciones_masculinas_estimadas': total_masc,
+            'menciones_femeninas_estimadas': total_fem,
+            'ratio_sesgo': ratio,
+            'porcentaje_femenino': round(100 * total_fem / (total_masc + total_fem), 2)
+                                   if total_masc + total_fem else 0.0,
+            'anchura_relativa': None,
+            'estratos_sin_muestra': sorted(set(poblacion) - set(leidos))
+        }
+        intervalo = intervalo_bootstrap(masculinas, femeninas, pesos,
+                                        self.remuestreos_bootstrap, self.confianza_bootstrap,
+                                        semilla, estratos=estratos,
+                                        poblacion=poblacion_estratos)
+        if intervalo:
+            estimacion['intervalo_confianza'] = intervalo
+            inferior, superior = intervalo['ratio_sesgo']
+            if 0 < ratio < float('inf') and superior < float('inf'):
+                estimacion['anchura_relativa'] = round((superior - inferior) / ratio, 4)
+        return estimacion
+
+    # =====================================================================
+    # DESCUBRIMIENTO DE NOMBRES EN ARCHIVOS .ent
+    # =====================================================================
+
+    def descubrir_entidades(self, directorio=None, maximo_candidatos=50):
+        """
+        Recorre en streaming los archivos .ent (TIPO<TAB>ENTIDAD) y propone
+        como candidatos al léxico los nombres de pila PERSON más frecuentes
+        que no están en nombres_masculinos/nombres_femeninos
+
+        Usa memoria fija sea cual sea el tamaño del corpus: HyperLogLog para
+        contar personas y nombres distintos, Count-Min para las frecuencias
+        y Misra-Gries para la lista de más frecuentes.
+
+        Returns:
+            dict: Resumen del descubrimiento y lista de candidatos
+        """
+        if directorio is None:
+            directorio = self.base_directory
+
+        print(f"🔎 Buscando entidades PERSON en archivos .ent de: {directorio}")
 
-        print(f"📂 Analizando directorio: {directorio}")
+        # Tratamientos y partículas que preceden al nombre o no lo son
+        omitidas = {palabra.rstrip('.') for palabra in self.tabla_tratamientos()}
+        omitidas |= {'de', 'del', 'la', 'las', 'el', 'los', 'y', 'san', 'santa', 'van', 'von'}
+
+        personas_distintas = HyperLogLog()
+        nombres_distintos = HyperLogLog()
+        frecuencias = CountMinSketch()
+        frecuentes = FrecuentesMisraGries()
+        archivos = 0
+        menciones = 0
 
-        archivos_txt = []
         for root, dirs, files in os.walk(directorio):
             for file in files:
-                if file.endswith('.txt'):
-                    archivos_txt.append(os.path.join(root, file))
-
-        print(f"📄 Encontrados {len(archivos_txt)} archivos TXT")
+                if not file.endswith('.ent'):
+                    continue
+                archivos += 1
+                with open(os.path.join(root, file), 'r', encoding='utf-8',
+                          errors='ignore') as f:
+                    for linea in f:
+                        tipo, _, entidad = linea.rstrip('\n').partition('\t')
+                        if tipo != 'PERSON':
+                            continue
+                        menciones += 1
+                        palabras = _PATRON_PALABRA.findall(entidad)
+                        personas_distintas.agregar(' '.join(palabras).lower())
 
-        # Analizar cada archivo
-        resultados_archivos = []
-        total_masc = 0
-        total_fem = 0
-        total_palabras = 0
+                        # Nombre de pila: primera palabra de una entidad de
+                        # al menos dos palabras ("Anita Villamayor"), tras
+                        # saltar tratamientos ("Don Gonzalo Avello")
+                        while palabras and palabras[0].lower() in omitidas:
+                            palabras.pop(0)
+                        if len(palabras) < 2:
+                            continue
+                        nombre = palabras[0]
+                        if len(nombre) < 3 or not nombre.isalpha() or not nombre[0].isupper():
+                            continue
+                        nombre = nombre.lower()
+                        if nombre in self.nombres_masculinos or nombre in self.nombres_femeninos:
+                            continue
+                        nombres_distintos.agregar(nombre)
+                        frecuencias.agregar(nombre)
+                        frecuentes.agregar(nombre)
 
-        for i, filepath in enumerate(archivos_txt, 1):
-            print(f"⚙️  Procesando {i}/{len(archivos_txt)}: {os.path.basename(filepath)}")
-
-            resultado = self.analizar_archivo(filepath)
-            if resultado:
-                resultados_archivos.append(resultado)
-                total_masc += resultado['totales']['menciones_masculinas']
-                total_fem += resultado['totales']['menciones_femeninas']
-                total_palabras += resultado['palabras']
+        candidatos = sorted(
+            ((frecuencias.estimar(nombre), nombre) for nombre in frecuentes.candidatos()),
+            reverse=True
+        )[:maximo_candidatos]
 
-        # Consolidar resultados
-        self.resultados = {
-            'metadata': {
-                'directorio': directorio,
-                'total_archivos': len(resultados_archivos),
-                'total_palabras': total_palabras,
-                'fecha_analisis': datetime.now().isoformat()
-            },
-            'resumen_general': {
-                'menciones_masculinas_total': total_masc,
-                'menciones_femeninas_total': total_fem,
-                'ratio_sesgo_general': self.calcular_ratio_genero(total_masc, total_fem),
-                'porcentaje_masculino': round(
-                    (total_masc / (total_masc + total_fem) * 100)
-                    if (total_masc + total_fem) > 0 else 0, 2
-                ),
-                'porcentaje_femenino': round(
-                    (total_fem / (total_masc + total_fem) * 100)
-                    if (total_masc + total_fem) > 0 else 0, 2
-                )
-            },
-            'archivos': resultados_archivos
+        descubrimiento = {
+            'directorio': directorio,
+            'archivos_ent': archivos,
+            'menciones_persona': menciones,
+            'personas_distintas_aprox': personas_distintas.estimar(),
+            'nombres_desconocidos_distintos_aprox': nombres_distintos.estimar(),
+            'candidatos': [
+                {
+                    'nombre': nombre,
+                    'frecuencia_aprox': frecuencia,
+                    'genero_probable': ('femeninos' if nombre.endswith('a') else
+                                        'masculinos' if nombre.endswith('o') else None)
+                }
+                for frecuencia, nombre in candidatos
+            ]
         }
 
-        return self.resultados
+        print(f"📄 {archivos} archivos .ent, {menciones:,} menciones PERSON "
+              f"(~{descubrimiento['personas_distintas_aprox']:,} personas distintas)")
+        return descubrimiento
 
     def guardar_resultados(self, output_file='resultados_deteccion_genero.json'):
         """
@@ -411,6 +3918,178 @@ class DetectorGeneroMusical:
         print(f"\n✅ Resultados guardados en: {output_file}")
         return output_file
 
+    def exportar_columnar(self, output_path='resultados_columnar'):
+        """
+        Exporta los resultados en formato columnar de NumPy
+
+        - conteos: matriz archivos × términos (int64)
+        - vocabulario: "categoria/genero/termino" de cada columna
+        - archivos, rutas, palabras, menciones_masculinas,
+          menciones_femeninas, ratio_sesgo: un valor por archivo
+        - celdas, inicio_celdas: columnas de cada archivo en el orden de
+          sus diccionarios (las de la fila i van de inicio_celdas[i] a
+          inicio_celdas[i + 1])
+        - resto: el JSON sin las partes anteriores (ejemplos, metadatos...)
+
+        Si output_path termina en .npz se escribe un único archivo
+        comprimido; si no, un directorio con un .npy por columna que se
+        puede abrir con np.load(..., mmap_mode='r'). El JSON original se
+        reconstruye con cargar_resultados_columnar(), con el mismo orden
+        de claves: guardar_resultados() escribe el mismo texto.
+
+        Args:
+            output_path (str): Directorio o archivo .npz de salida
+        """
+        if np is None:
+            print("⚠️  NumPy no está instalado: se omite la exportación columnar")
+            return None
+
+        archivos = self.resultados['archivos']
+
+        # Vocabulario: todas las columnas con algún conteo en algún archivo
+        vocabulario = set()
+        for archivo in archivos:
+            for categoria, genero, termino, _ in celdas_conteo(archivo):
+                vocabulario.add((categoria, genero, termino))
+        vocabulario = sorted(vocabulario)
+        columna = {clave: j for j, clave in enumerate(vocabulario)}
+
+        conteos = np.zeros((len(archivos), len(vocabulario)), dtype=np.int64)
+        celdas = array('l')
+        inicio_celdas = array('q', [0])
+        resto_archivos = []
+        for i, archivo in enumerate(archivos):
+            for categoria, genero, termino, n in celdas_conteo(archivo):
+                j = columna[(categoria, genero, termino)]
+                conteos[i, j] = n
+                celdas.append(j)
+            inicio_celdas.append(len(celdas))
+
+            # Se conserva la estructura (y el orden de claves) con huecos
+            resto = json.loads(json.dumps(archivo))
+            resto['archivo'] = resto['ruta'] = resto['palabras'] = resto['totales'] = None
+            detecciones = resto['detecciones']
+            detecciones['nombres']['masculinos'] = detecciones['nombres']['femeninos'] = None
+            detecciones['profesiones']['masculinas'] = detecciones['profesiones']['femeninas'] = None
+            detecciones['tratamientos'] = detecciones['diversidad'] = None
+            for seccion in detecciones.get('adicionales', {}):
+                detecciones['adicionales'][seccion] = None
+            resto_archivos.append(resto)
+
+        # 'archivos' se sustituye en su sitio para no alterar el orden de claves
+        resto = dict(self.resultados, archivos=resto_archivos)
+
+        columnas = {
+            'conteos': conteos,
+            'vocabulario': np.array(['/'.join(clave) for clave in vocabulario], dtype=str),
+            'archivos': np.array([a['archivo'] for a in archivos], dtype=str),
+            'rutas': np.array([a['ruta'] for a in archivos], dtype=str),
+            'palabras': np.array([a['palabras'] for a in archivos], dtype=np.int64),
+            'menciones_masculinas': np.array(
+                [a['totales']['menciones_masculinas'] for a in archivos], dtype=np.int64),
+            'menciones_femeninas': np.array(
+                [a['totales']['menciones_femeninas'] for a in archivos], dtype=np.int64),
+            'ratio_sesgo': np.array(
+                [a['totales']['ratio_sesgo'] for a in archivos], dtype=np.float64),
+            'celdas': np.array(celdas, dtype=np.int64),
+            'inicio_celdas': np.array(inicio_celdas, dtype=np.int64)
+        }
+        resto_json = json.dumps(resto, ensure_ascii=False)
+
+        if output_path.endswith('.npz'):
+            np.savez_compressed(
+                output_path,
+                resto=np.frombuffer(resto_json.encode('utf-8'), dtype=np.uint8),
+                **columnas)
+        else:
+            os.makedirs(output_path, exist_ok=True)
+            for nombre, valores in columnas.items():
+                np.save(os.path.join(output_path, nombre + '.npy'), valores)
+            with open(os.path.join(output_path, 'resto.json'), 'w', encoding='utf-8') as f:
+                f.write(resto_json)
+
+        print(f"✅ Exportación columnar ({len(archivos)} archivos × "
+              f"{len(vocabulario)} términos): {output_path}")
+        return output_path
+
+    def generar_indice_terminos(self, directorio_salida='analisis_genero_terminos',
+                                archivos_por_bloque=5000, maximo_por_fragmento=50000):
+        """
+        Escribe junto a la web un índice invertido término -> archivos,
+        repartido en fragmentos por prefijo del término
+
+        La web solo carga el fragmento del término que se consulta y los
+        bloques de nombres de archivo que necesita, así sigue siendo
+        pequeña aunque el corpus tenga cientos de miles de archivos. Los
+        fragmentos son scripts (indiceTerminos.fragmento(...)) y no JSON
+        para que funcionen también abriendo la web como archivo local, donde
+        el navegador no permite fetch().
+
+        Cada fragmento agrupa los términos por su primera letra; si supera
+        maximo_por_fragmento apariciones (archivo, término) se divide por
+        las dos primeras letras, y así hasta tres.
+
+        Args:
+            directorio_salida (str): Directorio del índice (se crea si no existe)
+            archivos_por_bloque (int): Nombres de archivo por bloque
+
+        Returns:
+            str: directorio_salida
+        """
+        archivos = self.resultados['archivos']
+        directorio = self.resultados['metadata']['directorio']
+        entradas = defaultdict(list)
+        for i, archivo in enumerate(archivos):
+            for categoria, genero, termino, n in celdas_conteo(archivo):
+                if n:
+                    entradas[f"{categoria}/{genero}/{termino}"].append([i, n])
+        for apariciones in entradas.values():
+            apariciones.sort(key=lambda aparicion: (-aparicion[1], aparicion[0]))
+
+        fragmentos = {}
+
+        def repartir(grupo, longitud):
+            subgrupos = defaultdict(dict)
+            for clave, apariciones in grupo.items():
+                subgrupos[prefijo_termino(clave.split('/', 2)[2], longitud)][clave] = apariciones
+            for prefijo, subgrupo in subgrupos.items():
+                if (len(prefijo) == longitud and longitud < 3 and
+                        sum(map(len, subgrupo.values())) > maximo_por_fragmento):
+                    repartir(subgrupo, longitud + 1)
+                else:
+                    fragmentos[prefijo] = subgrupo
+
+        repartir(entradas, 1)
+
+        os.makedirs(directorio_salida, exist_ok=True)
+        for nombre in os.listdir(directorio_salida):
+            if re.fullmatch(r'(?:t_\w*|a_\d+|indice)\.js', nombre):
+                os.remove(os.path.join(directorio_salida, nombre))
+
+        def escribir(nombre, llamada, *argumentos):
+            with open(os.path.join(directorio_salida, nombre), 'w', encoding='utf-8') as f:
+                f.write(f"indiceTerminos.{llamada}(" +
+                        ', '.join(json.dumps(a, ensure_ascii=False, separators=(',', ':'))
+                                  for a in argumentos) + ");\n")
+
+        for prefijo, grupo in fragmentos.items():
+            escribir(f"t_{prefijo}.js", 'fragmento', prefijo, grupo)
+        for bloque, inicio in enumerate(range(0, len(archivos), archivos_por_bloque)):
+            escribir(f"a_{bloque}.js", 'bloqueArchivos', bloque, [
+                [archivo['archivo'], os.path.relpath(archivo['ruta'], directorio)]
+                for archivo in archivos[inicio:inicio + archivos_por_bloque]
+            ])
+        escribir('indice.js', 'iniciar', {
+            'fragmentos': {prefijo: len(grupo) for prefijo, grupo in sorted(fragmentos.items())},
+            'archivos_por_bloque': archivos_por_bloque,
+            'total_archivos': len(archivos),
+            'total_terminos': len(entradas)
+        })
+
+        print(f"✅ Índice de términos generado: {directorio_salida}/ "
+              f"({len(entradas):,} términos en {len(fragmentos)} fragmentos)")
+        return directorio_salida
+
     def generar_reporte_texto(self, output_file='reporte_genero.txt'):
         """
         Genera un reporte legible en texto plano
@@ -446,6 +4125,11 @@ class DetectorGeneroMusical:
                 f.write(f"⚠️  Ratio de sesgo: ∞:1 (solo menciones masculinas)\n")
             else:
                 f.write(f"📊 Ratio de sesgo de género: {ratio}:1 (masculino:femenino)\n")
+            if 'intervalo_confianza' in resumen:
+                intervalo = resumen['intervalo_confianza']
+                f.write(f"📏 {formatear_intervalo(intervalo)} "
+                       f"(bootstrap de {intervalo['remuestreos']:,} remuestreos de archivos, "
+                       f"semilla {intervalo['semilla']})\n")
 
             f.write("\n")
             f.write("INTERPRETACIÓN:\n")
@@ -460,6 +4144,34 @@ class DetectorGeneroMusical:
 
             f.write("\n")
 
+            # Desglose por publicación y año, con la incertidumbre de cada grupo
+            for tipo, titulo in (('publicaciones', "DESGLOSE POR PUBLICACIÓN"),
+                                 ('periodos', "DESGLOSE POR AÑO")):
+                grupos = self.resultados.get('desglose', {}).get(tipo, {})
+                if len(grupos) < 2:
+                    continue
+                f.write("-"*80 + "\n")
+                f.write(titulo + "\n")
+                f.write("-"*80 + "\n")
+                for clave, grupo in grupos.items():
+                    f.write(f"{clave}: {grupo['archivos']} archivos | "
+                           f"Masc: {grupo['menciones_masculinas']} | "
+                           f"Fem: {grupo['menciones_femeninas']} | "
+                           f"Ratio: {grupo['ratio_sesgo']}:1 "
+                           f"{formatear_intervalo(grupo.get('intervalo_confianza'))}\n")
+                f.write("\n")
+
+            # Detectores adicionales (instrumentos, agrupaciones...)
+            for seccion, categorias in self.resultados.get('adicionales', {}).items():
+                f.write("-"*80 + "\n")
+                f.write(f"DETECTOR ADICIONAL: {seccion.upper()}\n")
+                f.write("-"*80 + "\n")
+                for categoria, conteo in categorias.items():
+                    terminos = ', '.join(f"{termino} ({n:,})"
+                                         for termino, n in list(conteo.items())[:8])
+                    f.write(f"{categoria}: {sum(conteo.values()):,} | {terminos}\n")
+                f.write("\n")
+
             # Top 10 archivos con mayor sesgo
             f.write("-"*80 + "\n")
             f.write("TOP 10 ARCHIVOS CON MAYOR SESGO DE GÉNERO\n")
@@ -481,12 +4193,15 @@ class DetectorGeneroMusical:
         print(f"✅ Reporte guardado en: {output_file}")
         return output_file
 
-    def generar_web_interactiva(self, output_file='analisis_genero.html'):
+    def generar_web_interactiva(self, output_file='analisis_genero.html', indice_terminos=None):
         """
         Genera una página web interactiva con gráficos usando Chart.js
 
         Args:
             output_file (str): Nombre del archivo HTML de salida
+            indice_terminos (str): Directorio de generar_indice_terminos();
+                                   si se indica, la web permite consultar en
+                                   qué archivos aparece cada término
         """
         resumen = self.resultados['resumen_general']
         meta = self.resultados['metadata']
@@ -692,6 +4407,33 @@ class DetectorGeneroMusical:
         .names-column.female .name-item .count {{
             background: #f687b3;
         }}
+        .name-item.consultable {{
+            cursor: pointer;
+        }}
+        .name-item.consultable:hover {{
+            background: #eef0fd;
+        }}
+        .buscador input {{
+            padding: 10px 15px;
+            width: 60%;
+            border: 2px solid #667eea;
+            border-radius: 8px;
+            font-size: 1em;
+        }}
+        .buscador button, .sugerencia {{
+            padding: 10px 20px;
+            margin-left: 10px;
+            background: #667eea;
+            color: white;
+            border: none;
+            border-radius: 8px;
+            cursor: pointer;
+        }}
+        .sugerencia {{
+            display: inline-block;
+            padding: 4px 12px;
+            margin: 4px;
+        }}
         table {{
             width: 100%;
             border-collapse: collapse;
@@ -759,6 +4501,7 @@ class DetectorGeneroMusical:
                 <h3>📊 Ratio de Sesgo</h3>
                 <div class="number">{resumen['ratio_sesgo_general']}:1</div>
                 <div>Masculino/Femenino</div>
+                <div>{formatear_intervalo(resumen.get('intervalo_confianza'))}</div>
             </div>
             <div class="stat-card">
                 <h3>📄 Archivos Analizados</h3>
@@ -800,6 +4543,61 @@ class DetectorGeneroMusical:
         </div>
 """
 
+        # Desglose por publicación y año con intervalos de confianza
+        for tipo, titulo in (('publicaciones', "📚 Desglose por Publicación"),
+                             ('periodos', "📅 Desglose por Año")):
+            grupos = self.resultados.get('desglose', {}).get(tipo, {})
+            if len(grupos) < 2:
+                continue
+            html_content += f"""
+        <div class="details-section">
+            <h2>{titulo}</h2>
+            <table>
+                <tr>
+                    <th>{'Publicación' if tipo == 'publicaciones' else 'Año'}</th>
+                    <th>Archivos</th><th>Masculinas</th><th>Femeninas</th>
+                    <th>Ratio</th><th>Intervalo de confianza</th>
+                </tr>
+"""
+            for clave, grupo in grupos.items():
+                html_content += f"""
+                <tr>
+                    <td><strong>{html.escape(clave)}</strong></td>
+                    <td>{grupo['archivos']}</td>
+                    <td>{grupo['menciones_masculinas']}</td>
+                    <td>{grupo['menciones_femeninas']}</td>
+                    <td>{grupo['ratio_sesgo']}:1</td>
+                    <td>{formatear_intervalo(grupo.get('intervalo_confianza'))}</td>
+                </tr>
+"""
+            html_content += """
+            </table>
+        </div>
+"""
+
+        # Detectores adicionales (instrumentos, agrupaciones...)
+        for seccion, categorias in self.resultados.get('adicionales', {}).items():
+            html_content += f"""
+        <div class="details-section">
+            <h2>🔎 {html.escape(seccion.capitalize())}</h2>
+            <table>
+                <tr><th>Categoría</th><th>Menciones</th><th>Términos más frecuentes</th></tr>
+"""
+            for categoria, conteo in categorias.items():
+                terminos = ', '.join(f"{html.escape(termino)} ({n:,})"
+                                     for termino, n in list(conteo.items())[:8])
+                html_content += f"""
+                <tr>
+                    <td><strong>{html.escape(categoria)}</strong></td>
+                    <td>{sum(conteo.values()):,}</td>
+                    <td>{terminos}</td>
+                </tr>
+"""
+            html_content += """
+            </table>
+        </div>
+"""
+
         html_content += f"""
         <div class="chart-container">
             <h2>Distribución por Género</h2>
@@ -823,9 +4621,13 @@ class DetectorGeneroMusical:
             ejemplos_str = ""
             if nombre in ejemplos_masculinos and ejemplos_masculinos[nombre]:
                 ejemplos_str = f'<div class="ejemplos">ej: {", ".join(ejemplos_masculinos[nombre])}</div>'
+            consulta = ''
+            if indice_terminos:
+                consulta = (' consultable" onclick="indiceTerminos.buscar('
+                            + html.escape(json.dumps(nombre)) + ')')
 
             html_content += f"""
-                    <div class="name-item">
+                    <div class="name-item{consulta}">
                         <div class="name">
                             {nombre.capitalize()}
                             {ejemplos_str}
@@ -845,9 +4647,13 @@ class DetectorGeneroMusical:
             ejemplos_str = ""
             if nombre in ejemplos_femeninos and ejemplos_femeninos[nombre]:
                 ejemplos_str = f'<div class="ejemplos">ej: {", ".join(ejemplos_femeninos[nombre])}</div>'
+            consulta = ''
+            if indice_terminos:
+                consulta = (' consultable" onclick="indiceTerminos.buscar('
+                            + html.escape(json.dumps(nombre)) + ')')
 
             html_content += f"""
-                    <div class="name-item">
+                    <div class="name-item{consulta}">
                         <div class="name">
                             {nombre.capitalize()}
                             {ejemplos_str}
@@ -902,7 +4708,22 @@ class DetectorGeneroMusical:
                 </tbody>
             </table>
         </div>
+"""
+
+        # Consulta de términos sobre el índice de generar_indice_terminos()
+        if indice_terminos:
+            html_content += """
+        <div class="details-section">
+            <h2>🔎 ¿Dónde aparece un término?</h2>
+            <form class="buscador" onsubmit="indiceTerminos.buscar(this.termino.value); return false;">
+                <input name="termino" placeholder="Nombre, profesión o término (p. ej. pianista)">
+                <button type="submit">Buscar</button>
+            </form>
+            <div id="resultadosTermino"></div>
+        </div>
+"""
 
+        html_content += """
         <div class="metadata">
             <strong>📂 Directorio analizado:</strong> """ + meta['directorio'] + """<br>
             <strong>📅 Fecha de análisis:</strong> """ + meta['fecha_analisis'] + """<br>
@@ -1009,6 +4830,112 @@ class DetectorGeneroMusical:
             }
         });
     </script>
+"""
+
+        if indice_terminos:
+            ruta_indice = os.path.relpath(
+                indice_terminos, os.path.dirname(os.path.abspath(output_file))).replace(os.sep, '/')
+            html_content += """
+    <script>
+        // Índice de términos: se cargan solo los fragmentos que se consultan
+        const indiceTerminos = {
+            ruta: """ + json.dumps(ruta_indice) + """,
+            manifiesto: null,
+            fragmentos: {},
+            bloques: {},
+            scripts: {},
+            maximoArchivos: 100,
+
+            iniciar(manifiesto) { this.manifiesto = manifiesto; },
+            fragmento(prefijo, datos) { this.fragmentos[prefijo] = datos; },
+            bloqueArchivos(bloque, archivos) { this.bloques[bloque] = archivos; },
+
+            cargar(nombre) {
+                if (!this.scripts[nombre]) {
+                    this.scripts[nombre] = new Promise((resolver, rechazar) => {
+                        const script = document.createElement('script');
+                        script.src = this.ruta + '/' + nombre;
+                        script.onload = resolver;
+                        script.onerror = () => rechazar(new Error('No se pudo cargar ' + script.src));
+                        document.head.appendChild(script);
+                    });
+                }
+                return this.scripts[nombre];
+            },
+
+            normalizar(texto) {
+                return texto.normalize('NFD').replace(/\p{Mn}/gu, '').toLowerCase();
+            },
+
+            prefijo(termino) {
+                const normal = Array.from(this.normalizar(termino))
+                    .map(c => /[a-z0-9]/.test(c) ? c : '_').join('');
+                for (let longitud = 3; longitud > 0; longitud--) {
+                    if (normal.slice(0, longitud) in this.manifiesto.fragmentos) {
+                        return normal.slice(0, longitud);
+                    }
+                }
+                return null;
+            },
+
+            escapar(texto) {
+                const entidades = { '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;' };
+                return String(texto).replace(/[&<>"']/g, c => entidades[c]);
+            },
+
+            async buscar(termino) {
+                const salida = document.getElementById('resultadosTermino');
+                termino = termino.trim();
+                if (!termino) return;
+                salida.scrollIntoView({ behavior: 'smooth' });
+                salida.innerHTML = '<p>Buscando…</p>';
+                try {
+                    await this.cargar('indice.js');
+                    const prefijo = this.prefijo(termino);
+                    if (prefijo !== null) await this.cargar('t_' + prefijo + '.js');
+                    const fragmento = prefijo !== null ? this.fragmentos[prefijo] : {};
+                    const buscado = this.normalizar(termino);
+                    const claves = Object.keys(fragmento);
+                    const exactas = claves.filter(c => this.normalizar(c.split('/').slice(2).join('/')) === buscado);
+                    if (!exactas.length) {
+                        const parecidas = claves.filter(c => this.normalizar(c.split('/').slice(2).join('/')).startsWith(buscado));
+                        salida.innerHTML = '<p>Sin resultados para «' + this.escapar(termino) + '».</p>' +
+                            [...new Set(parecidas.map(c => c.split('/').slice(2).join('/')))].slice(0, 20)
+                                .map(t => '<span class="sugerencia" onclick="indiceTerminos.buscar(' +
+                                          this.escapar(JSON.stringify(t)) + ')">' + this.escapar(t) + '</span>').join('');
+                        return;
+                    }
+                    const porBloque = this.manifiesto.archivos_por_bloque;
+                    const bloques = new Set();
+                    exactas.forEach(c => fragmento[c].slice(0, this.maximoArchivos)
+                        .forEach(([id]) => bloques.add(Math.floor(id / porBloque))));
+                    await Promise.all([...bloques].map(b => this.cargar('a_' + b + '.js')));
+
+                    salida.innerHTML = exactas.map(clave => {
+                        const [categoria, genero] = clave.split('/');
+                        const apariciones = fragmento[clave];
+                        const total = apariciones.reduce((suma, [, n]) => suma + n, 0);
+                        const filas = apariciones.slice(0, this.maximoArchivos).map(([id, n]) => {
+                            const [archivo, ruta] = this.bloques[Math.floor(id / porBloque)][id % porBloque];
+                            return '<tr><td title="' + this.escapar(ruta) + '">' + this.escapar(archivo) +
+                                   '</td><td>' + n.toLocaleString() + '</td></tr>';
+                        }).join('');
+                        return '<h3 style="margin-top: 20px;">' + this.escapar(categoria) +
+                               (genero ? ' · ' + this.escapar(genero) : '') + ': ' + total.toLocaleString() +
+                               ' menciones en ' + apariciones.length.toLocaleString() + ' archivos' +
+                               (apariciones.length > this.maximoArchivos ? ' (se muestran ' + this.maximoArchivos + ')' : '') +
+                               '</h3><table><tr><th>Archivo</th><th>Menciones</th></tr>' + filas + '</table>';
+                    }).join('');
+                } catch (error) {
+                    salida.innerHTML = '<p>⚠️ ' + this.escapar(error.message) +
+                        ' (el índice debe estar junto a la web)</p>';
+                }
+            }
+        };
+    </script>
+"""
+
+        html_content += """
 </body>
 </html>
 """
@@ -1019,20 +4946,413 @@ class DetectorGeneroMusical:
         print(f"✅ Web interactiva generada: {output_file}")
         return output_file
 
+    def generar_web_comparativa(self, output_file='analisis_comparativo.html'):
+        """
+        Genera la página web que compara los corpus de analizar_corpus()
+
+        Args:
+            output_file (str): Nombre del archivo HTML de salida
+        """
+        comparacion = self.resultados['comparacion']
+        meta = self.resultados['metadata']
+        etiquetas = json.dumps([c['etiqueta'] for c in comparacion], ensure_ascii=False)
+        masculinas = json.dumps([c['masculinas_por_10000_palabras'] for c in comparacion])
+        femeninas = json.dumps([c['femeninas_por_10000_palabras'] for c in comparacion])
+
+        def lista_terminos(terminos):
+            return ', '.join(f"{html.escape(termino)} ({n:,})" for termino, n in terminos[:5]) or '-'
+
+        filas = []
+        for c in comparacion:
+            ratio = c['ratio_sesgo']
+            clase = ('ratio-extreme' if ratio > 10 else
+                     'ratio-high' if ratio > 3 else 'ratio-moderate')
+            filas.append(f"""
+                <tr>
+                    <td><strong>{html.escape(c['etiqueta'])}</strong></td>
+                    <td>{c['archivos']:,}</td>
+                    <td>{c['palabras']:,}</td>
+                    <td>{c['menciones_masculinas']:,}</td>
+                    <td>{c['menciones_femeninas']:,}</td>
+                    <td>{c['porcentaje_femenino']}%</td>
+                    <td><span class="ratio-badge {clase}">{ratio}:1</span></td>
+                    <td>{formatear_intervalo(c['intervalo_confianza'])}</td>
+                </tr>""")
+
+        columnas = []
+        for c in comparacion:
+            columnas.append(f"""
+                <div class="details-section">
+                    <h2>{html.escape(c['etiqueta'])}</h2>
+                    <p><strong>👨 Nombres:</strong> {lista_terminos(c['nombres_masculinos'])}</p>
+                    <p><strong>👩 Nombres:</strong> {lista_terminos(c['nombres_femeninos'])}</p>
+                    <p><strong>👨 Profesiones:</strong> {lista_terminos(c['profesiones_masculinas'])}</p>
+                    <p><strong>👩 Profesiones:</strong> {lista_terminos(c['profesiones_femeninas'])}</p>
+                </div>""")
+
+        html_content = f"""<!DOCTYPE html>
+<html lang="es">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Comparación de Corpus - Género en Personas Musicales</title>
+    <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
+    <style>
+        * {{ margin: 0; padding: 0; box-sizing: border-box; }}
+        body {{
+            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+            padding: 20px;
+            min-height: 100vh;
+        }}
+        .container {{
+            max-width: 1200px;
+            margin: 0 auto;
+            background: white;
+            border-radius: 20px;
+            box-shadow: 0 20px 60px rgba(0,0,0,0.3);
+            padding: 40px;
+        }}
+        h1 {{ text-align: center; color: #333; margin-bottom: 10px; font-size: 2.5em; }}
+        .subtitle {{ text-align: center; color: #666; margin-bottom: 30px; font-size: 1.1em; }}
+        .chart-container {{
+            background: #f8f9fa;
+            padding: 30px;
+            border-radius: 15px;
+            margin-bottom: 30px;
+        }}
+        .chart-container h2, .details-section h2 {{ color: #333; margin-bottom: 20px; }}
+        .details-grid {{
+            display: grid;
+            grid-template-columns: repeat(auto-fit, minmax(300px, 1fr));
+            gap: 20px;
+        }}
+        .details-section {{
+            padding: 25px;
+            border-radius: 15px;
+            border: 1px solid #e0e0e0;
+        }}
+        .details-section h2 {{ padding-bottom: 10px; border-bottom: 3px solid #667eea; }}
+        .details-section p {{ margin-bottom: 10px; color: #444; }}
+        table {{ width: 100%; border-collapse: collapse; margin-bottom: 30px; }}
+        th {{
+            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+            color: white;
+            padding: 15px;
+            text-align: left;
+        }}
+        td {{ padding: 12px 15px; border-bottom: 1px solid #eee; }}
+        .ratio-badge {{ display: inline-block; padding: 4px 12px; border-radius: 20px; font-weight: bold; }}
+        .ratio-extreme {{ background: #fee; color: #c33; }}
+        .ratio-high {{ background: #fffbeb; color: #92400e; }}
+        .ratio-moderate {{ background: #f0fdf4; color: #166534; }}
+        footer {{ text-align: center; margin-top: 40px; padding-top: 20px; border-top: 2px solid #eee; color: #666; }}
+    </style>
+</head>
+<body>
+    <div class="container">
+        <h1>🎵 Comparación de Corpus</h1>
+        <p class="subtitle">Proyecto LexiMus - {len(comparacion)} corpus,
+            {meta['total_archivos']:,} archivos</p>
+
+        <table>
+            <tr>
+                <th>Corpus</th><th>Archivos</th><th>Palabras</th><th>Masculinas</th>
+                <th>Femeninas</th><th>% Femenino</th><th>Ratio</th><th>Intervalo</th>
+            </tr>{''.join(filas)}
+        </table>
+
+        <div class="chart-container">
+            <h2>Menciones por cada 10.000 palabras</h2>
+            <canvas id="comparacionChart"></canvas>
+        </div>
+
+        <div class="details-grid">{''.join(columnas)}
+        </div>
+
+        <footer>
+            <p>Generado el {datetime.now().strftime('%d/%m/%Y %H:%M')} ·
+               Detector Automático de Género en Personas Musicales</p>
+        </footer>
+    </div>
+
+    <script>
+        new Chart(document.getElementById('comparacionChart'), {{
+            type: 'bar',
+            data: {{
+                labels: {etiquetas},
+                datasets: [
+                    {{ label: 'Masculino', data: {masculinas}, backgroundColor: '#667eea', borderRadius: 10 }},
+                    {{ label: 'Femenino', data: {femeninas}, backgroundColor: '#f687b3', borderRadius: 10 }}
+                ]
+            }},
+            options: {{
+                responsive: true,
+                plugins: {{ legend: {{ position: 'bottom' }} }},
+                scales: {{ y: {{ beginAtZero: true }} }}
+            }}
+        }});
+    </script>
+</body>
+</html>
+"""
+
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write(html_content)
+
+        print(f"✅ Web comparativa generada: {output_file}")
+        return output_file
+
+
+# ==========================================================================
+# TRABAJADORES (multiprocessing)
+# ==========================================================================
+
+_DETECTOR_TRABAJADOR = None
+
+
+def _inicializar_trabajador(detector):
+    """Recibe una copia del detector una sola vez por proceso del pool"""
+    global _DETECTOR_TRABAJADOR
+    _DETECTOR_TRABAJADOR = detector
+
+
+def _nucleos_disponibles():
+    """Núcleos que puede usar este proceso (afinidad de CPU si se conoce)"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0)) or 1
+    return os.cpu_count() or 1
+
+
+def _ejecutar_tarea(tarea):
+    """Punto de entrada de cada tarea en los procesos del pool"""
+    return _DETECTOR_TRABAJADOR.ejecutar_tarea(tarea)
+
+
+def _calcular_huella(ruta):
+    """Calcula la huella MinHash de un archivo en un proceso del pool"""
+    return _DETECTOR_TRABAJADOR.calcular_huella(ruta)
+
 
 # ==========================================================================
 # FUNCIÓN PRINCIPAL
 # ==========================================================================
 
+def crear_parser():
+    """Define los argumentos de línea de comandos"""
+    parser = argparse.ArgumentParser(
+        description="Detector automático de género en personas musicales")
+    parser.add_argument('directorio', nargs='*',
+                        help="Directorio con archivos TXT, o varios como etiqueta=ruta "
+                             "para compararlos en una sola ejecución")
+    parser.add_argument('-p', '--procesos', type=int, default=1,
+                        help="Procesos en paralelo (0 = todos los núcleos, por defecto 1)")
+    parser.add_argument('--lexicos-compartidos', action='store_true',
+                        help="Los procesos comparten los léxicos de nombres en memoria "
+                             "en lugar de tener cada uno su copia")
+    parser.add_argument('--duplicados', action='store_true',
+                        help="Agrupar documentos casi idénticos y analizar uno por grupo")
+    parser.add_argument('--umbral-duplicados', type=float, default=0.8,
+                        help="Similitud mínima (0-1) entre duplicados (por defecto 0.8)")
+    parser.add_argument('--peso-duplicados', type=float, default=1.0,
+                        help="Peso de cada duplicado en el resumen (1 = contar, 0 = excluir)")
+    parser.add_argument('--difuso', action='store_true',
+                        help="Contar también variantes OCR de los nombres (Marìa, Joaqnín...)")
+    parser.add_argument('--distancia-difusa', type=int, default=1,
+                        help="Distancia de edición máxima de las variantes (por defecto 1)")
+    parser.add_argument('--coocurrencias', action='store_true',
+                        help="Relacionar cada persona con las profesiones cercanas")
+    parser.add_argument('--ventana', type=int, default=5,
+                        help="Palabras máximas entre persona y profesión (por defecto 5)")
+    parser.add_argument('--limite-segundos', type=float,
+                        help="Tiempo máximo de análisis por archivo")
+    parser.add_argument('--limite-bytes', type=int,
+                        help="Tamaño máximo (bytes) de archivo que se lee entero")
+    parser.add_argument('--limite-coincidencias', type=int,
+                        help="Coincidencias máximas por archivo")
+    parser.add_argument('--reintentar-fragmentos', action='store_true',
+                        help="Reintentar por fragmentos los archivos en cuarentena")
+    parser.add_argument('--sqlite', metavar='RUTA_DB',
+                        help="Guardar también los resultados en una base SQLite")
+    parser.add_argument('--columnar', metavar='RUTA',
+                        help="Exportar conteos en NumPy (.npz, o directorio de .npy)")
+    parser.add_argument('--motor', choices=DetectorGeneroMusical.MOTORES, default='referencia',
+                        help="Motor de detección (por defecto referencia; "
+                             "comprobar otro con el modo verificar)")
+    parser.add_argument('-q', '--quiet', action='store_true',
+                        help="No mostrar el progreso archivo a archivo")
+    parser.add_argument('--metricas', metavar='RUTA',
+                        help="Reescribir periódicamente métricas en formato Prometheus")
+    parser.add_argument('--segmentar', action='store_true',
+                        help="Resultados por artículo o sección además de por archivo")
+    parser.add_argument('--lineas-vacias', type=int, default=2,
+                        help="Líneas vacías seguidas que separan segmentos (por defecto 2)")
+    parser.add_argument('--bootstrap', type=int, default=2000, metavar='N',
+                        help="Remuestreos para los intervalos de confianza "
+                             "(0 = sin intervalos, por defecto 2000; requiere numpy)")
+    parser.add_argument('--confianza', type=float, default=0.95,
+                        help="Nivel de confianza de los intervalos (por defecto 0.95)")
+    parser.add_argument('--semilla', type=int,
+                        help="Semilla del bootstrap para resultados reproducibles")
+    parser.add_argument('--estimar', action='store_true',
+                        help="Estimación rápida con una muestra estratificada, hasta que el "
+                             "intervalo alcanza la anchura de --anchura")
+    parser.add_argument('--anchura', type=float, default=0.2,
+                        help="Anchura del intervalo de --estimar, en veces el ratio estimado "
+                             "(por defecto 0.2, es decir ±10%%)")
+    parser.add_argument('--estratos', choices=['publicacion', 'anio', 'tamano'],
+                        default='publicacion',
+                        help="Estratos de la muestra de --estimar (por defecto publicacion)")
+    parser.add_argument('--detectores', action='append', default=[],
+                        type=lambda valor: [v for v in valor.split(',') if v],
+                        metavar='DETECTOR[,DETECTOR...]',
+                        help="Detectores adicionales en la misma pasada, separados por comas: "
+                             "instrumentos, agrupaciones, instituciones o un archivo JSON "
+                             '{"seccion": {"terminos": {"categoria": [...]}}}')
+    parser.add_argument('--desambiguar', action='store_true',
+                        help="Contar 'pianista', 'cantante'... para un solo género "
+                             "según el determinante o adjetivo anterior")
+    parser.add_argument('--descubrir-entidades', action='store_true',
+                        help="Proponer nombres nuevos a partir de los archivos .ent y salir")
+    return parser
+
+
+def main_comparar(argumentos):
+    """
+    Compara dos ejecuciones guardadas en SQLite
+
+    Uso:
+        python3 detector_genero_musical.py comparar RUN_A RUN_B [--db RUTA_DB]
+    """
+    parser = argparse.ArgumentParser(
+        prog="detector_genero_musical.py comparar",
+        description="Compara dos ejecuciones guardadas con --sqlite")
+    parser.add_argument('ejecucion_a', type=int)
+    parser.add_argument('ejecucion_b', type=int)
+    parser.add_argument('--db', default='resultados_deteccion_genero.sqlite',
+                        help="Base SQLite (por defecto resultados_deteccion_genero.sqlite)")
+    parser.add_argument('--maximo', type=int, default=20,
+                        help="Archivos y términos que se muestran (por defecto 20)")
+    args = parser.parse_args(argumentos)
+
+    if not os.path.exists(args.db):
+        print(f"❌ ERROR: La base de datos no existe: {args.db}")
+        sys.exit(1)
+
+    almacen = AlmacenSQLite(args.db)
+    try:
+        diferencias = almacen.comparar(args.ejecucion_a, args.ejecucion_b, args.maximo)
+    except ValueError as e:
+        print(f"❌ ERROR: {e}")
+        sys.exit(1)
+    finally:
+        almacen.cerrar()
+
+    print(f"🔀 Ejecución {args.ejecucion_a} → {args.ejecucion_b}")
+    print("="*80)
+    print(f"➕ Archivos nuevos: {len(diferencias['archivos_nuevos'])}")
+    print(f"➖ Archivos eliminados: {len(diferencias['archivos_eliminados'])}")
+    print(f"✏️  Archivos con totales distintos: {diferencias['total_archivos_cambiados']}")
+    for cambio in diferencias['archivos_cambiados']:
+        print(f"   {os.path.basename(cambio['ruta'])}: "
+              f"Masc {cambio['masculinas'][0]} → {cambio['masculinas'][1]} | "
+              f"Fem {cambio['femeninas'][0]} → {cambio['femeninas'][1]}")
+    print(f"\n📊 Términos con conteo distinto: {diferencias['total_terminos_cambiados']}")
+    for termino in diferencias['terminos_cambiados']:
+        genero = f"/{termino['genero']}" if termino['genero'] else ''
+        print(f"   {termino['categoria']}{genero} '{termino['termino']}': "
+              f"{termino['antes']} → {termino['despues']} ({termino['diferencia']:+})")
+    return diferencias
+
+
+def interpretar_corpus(valores):
+    """
+    Convierte los argumentos "etiqueta=ruta" (o solo "ruta") en pares
+    (etiqueta, directorio); sin etiqueta se usa el nombre del directorio
+    """
+    corpus = []
+    for valor in valores:
+        etiqueta, separador, ruta = valor.partition('=')
+        if not separador or os.path.exists(valor):
+            etiqueta, ruta = os.path.basename(os.path.normpath(valor)), valor
+        corpus.append((etiqueta, ruta))
+    return corpus
+
+
+def main_verificar(argumentos):
+    """
+    Compara un motor de detección con el de referencia
+
+    Uso:
+        python3 detector_genero_musical.py verificar [DIRECTORIO] [--motor combinado]
+    """
+    parser = argparse.ArgumentParser(
+        prog="detector_genero_musical.py verificar",
+        description="Comprueba que un motor de detección da los mismos conteos "
+                    "por término que el motor de referencia")
+    parser.add_argument('directorio', nargs='?',
+                        default=os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                             'LeximusUSAL'),
+                        help="Corpus con archivos .txt o .wrd (por defecto LeximusUSAL)")
+    parser.add_argument('--motor', choices=DetectorGeneroMusical.MOTORES[1:],
+                        default='combinado', help="Motor a verificar (por defecto combinado)")
+    parser.add_argument('--aleatorios', type=int, default=200,
+                        help="Textos aleatorios adicionales (por defecto 200)")
+    parser.add_argument('--semilla', type=int, default=0,
+                        help="Semilla de los textos aleatorios (por defecto 0)")
+    parser.add_argument('--salida', default='verificacion_motores.json',
+                        help="Informe JSON (por defecto verificacion_motores.json)")
+    args = parser.parse_args(argumentos)
+
+    if not os.path.isdir(args.directorio):
+        print(f"⚠️  No existe el corpus {args.directorio}: solo textos aleatorios")
+        args.directorio = None
+
+    detector = DetectorGeneroMusical(args.directorio)
+    informe = detector.verificar_motor(args.motor, args.directorio, args.aleatorios,
+                                       args.semilla)
+    with open(args.salida, 'w', encoding='utf-8') as f:
+        json.dump(informe, f, ensure_ascii=False, indent=2)
+
+    segundos = informe['segundos']
+    print("="*80)
+    print(f"⏱️  Referencia: {segundos['referencia']} s | {args.motor}: {segundos[args.motor]} s "
+          f"(x{segundos['referencia'] / max(segundos[args.motor], 1e-9):.1f})")
+    if not informe['diferencias']:
+        print(f"✅ Conteos idénticos en los {informe['textos']} textos")
+    else:
+        print(f"❌ {len(informe['textos_con_diferencias'])} textos con conteos distintos")
+        for diferencia in informe['diferencias'][:20]:
+            genero = f"/{diferencia['genero']}" if diferencia['genero'] else ''
+            print(f"   {diferencia['categoria']}{genero} '{diferencia['termino']}': "
+                  f"{diferencia['referencia']} → {diferencia['motor']}")
+    print(f"📄 Informe guardado en: {args.salida}")
+    if informe['diferencias']:
+        sys.exit(1)
+    return informe
+
+
 def main():
     """
     Ejecuta el análisis completo
 
     Uso:
-        python3 detector_genero_musical.py /ruta/a/tus/archivos/txt
+        python3 detector_genero_musical.py /ruta/a/tus/archivos/txt [--procesos N]
+        python3 detector_genero_musical.py ondas=RUTA_A espana=RUTA_B [--procesos N]
+        python3 detector_genero_musical.py comparar RUN_A RUN_B [--db RUTA_DB]
+        python3 detector_genero_musical.py verificar [DIRECTORIO] [--motor combinado]
     """
+    if len(sys.argv) > 1 and sys.argv[1] == 'comparar':
+        main_comparar(sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == 'verificar':
+        main_verificar(sys.argv[2:])
+        return
+
+    args = crear_parser().parse_args()
+
     # Verificar argumentos de línea de comandos
-    if len(sys.argv) < 2:
+    if not args.directorio:
         print("❌ ERROR: Debes especificar la ruta al directorio con archivos TXT")
         print("\nUso:")
         print("  python3 detector_genero_musical.py /ruta/a/tus/archivos/txt")
@@ -1040,31 +5360,139 @@ def main():
         print("  python3 detector_genero_musical.py ~/Desktop/MisRevistas")
         sys.exit(1)
 
-    directorio_base = sys.argv[1]
+    corpus = interpretar_corpus(args.directorio)
+    directorio_base = corpus[0][1]
+    procesos = args.procesos if args.procesos > 0 else (os.cpu_count() or 1)
 
-    # Verificar que el directorio existe
-    if not os.path.exists(directorio_base):
-        print(f"❌ ERROR: El directorio no existe: {directorio_base}")
-        sys.exit(1)
+    # Verificar que los directorios existen
+    for _, directorio in corpus:
+        if not os.path.exists(directorio):
+            print(f"❌ ERROR: El directorio no existe: {directorio}")
+            sys.exit(1)
+
+        if not os.path.isdir(directorio):
+            print(f"❌ ERROR: La ruta no es un directorio: {directorio}")
+            sys.exit(1)
 
-    if not os.path.isdir(directorio_base):
-        print(f"❌ ERROR: La ruta no es un directorio: {directorio_base}")
+    etiquetas = [etiqueta for etiqueta, _ in corpus]
+    if len(set(etiquetas)) < len(etiquetas):
+        print(f"❌ ERROR: Etiquetas de corpus repetidas: {', '.join(etiquetas)}")
         sys.exit(1)
 
     print("🎵 DETECTOR AUTOMÁTICO DE GÉNERO EN PERSONAS MUSICALES")
     print("="*80)
-    print(f"📂 Directorio: {directorio_base}\n")
+    if len(corpus) == 1:
+        print(f"📂 Directorio: {directorio_base}\n")
+    else:
+        for etiqueta, directorio in corpus:
+            print(f"📂 {etiqueta}: {directorio}")
+        print()
 
     # Inicializar detector
     detector = DetectorGeneroMusical(directorio_base)
+    detector.detectar_duplicados = args.duplicados
+    detector.umbral_duplicados = args.umbral_duplicados
+    detector.peso_duplicados = args.peso_duplicados
+    detector.coincidencia_difusa = args.difuso
+    detector.distancia_difusa = args.distancia_difusa
+    detector.analizar_coocurrencias = args.coocurrencias
+    detector.ventana_coocurrencia = args.ventana
+    detector.limite_segundos_archivo = args.limite_segundos
+    detector.limite_bytes_archivo = args.limite_bytes
+    detector.limite_coincidencias_archivo = args.limite_coincidencias
+    detector.reintentar_por_fragmentos = args.reintentar_fragmentos
+    detector.silencioso = args.quiet
+    detector.compartir_lexicos = args.lexicos_compartidos
+    detector.motor_deteccion = args.motor
+    detector.segmentar = args.segmentar
+    detector.lineas_vacias_segmento = args.lineas_vacias
+    detector.remuestreos_bootstrap = args.bootstrap
+    detector.desambiguar_profesiones = args.desambiguar
+    detector.confianza_bootstrap = args.confianza
+    detector.semilla_bootstrap = args.semilla
+    detector.ruta_metricas = args.metricas
+    try:
+        for adicional in cargar_detectores([v for lista in args.detectores for v in lista]):
+            detector.registrar_detector(adicional)
+    except (ValueError, re.error, json.JSONDecodeError) as e:
+        print(f"❌ ERROR: {e}")
+        sys.exit(1)
+
+    # Modo descubrimiento: solo lee los .ent y propone candidatos al léxico
+    if args.descubrir_entidades and len(corpus) > 1:
+        print("❌ ERROR: --descubrir-entidades admite un solo directorio")
+        sys.exit(1)
+    if args.descubrir_entidades:
+        descubrimiento = detector.descubrir_entidades()
+        with open('candidatos_lexico.json', 'w', encoding='utf-8') as f:
+            json.dump(descubrimiento, f, ensure_ascii=False, indent=2)
+        print("\n🏆 Nombres desconocidos más frecuentes:")
+        for candidato in descubrimiento['candidatos'][:15]:
+            print(f"   {candidato['nombre']:<20} ~{candidato['frecuencia_aprox']:,}")
+        print("\n✅ Candidatos guardados en: candidatos_lexico.json")
+        return
+
+    # Estimación rápida: una muestra estratificada hasta alcanzar la precisión pedida
+    if args.estimar:
+        if len(corpus) > 1:
+            print("❌ ERROR: --estimar admite un solo directorio")
+            sys.exit(1)
+        if np is None:
+            print("❌ ERROR: --estimar necesita NumPy (pip install numpy)")
+            sys.exit(1)
+        detector.estratos_muestra = args.estratos
+        resultados = detector.estimar_directorio(directorio_base, procesos=procesos,
+                                                 anchura_objetivo=args.anchura)
+        detector.guardar_resultados('estimacion_genero.json')
+        estimacion = resultados['estimacion']
+        muestra = resultados['muestra']
+        print("\n" + "="*80)
+        print("✅ ESTIMACIÓN COMPLETADA" if estimacion['objetivo_alcanzado'] else
+              "⚠️  ESTIMACIÓN SIN ALCANZAR LA PRECISIÓN PEDIDA")
+        print("="*80)
+        print(f"📊 Ratio estimado: {estimacion.get('ratio_sesgo', '-')}:1 "
+              f"{formatear_intervalo(estimacion.get('intervalo_confianza'))}")
+        print(f"👩 Porcentaje femenino estimado: {estimacion.get('porcentaje_femenino', '-')}%")
+        print(f"📄 Leídos {muestra['archivos_leidos']:,} de {muestra['archivos_total']:,} archivos "
+              f"({muestra['fraccion_archivos']:.1%}, {muestra['fraccion_bytes']:.1%} de los bytes) "
+              f"en {resultados['metadata']['segundos']} s")
+        return
+
+    # Varios corpus: una sola ejecución y un informe comparativo
+    if len(corpus) > 1:
+        if args.sqlite or args.columnar:
+            print("⚠️  --sqlite y --columnar se aplican a un solo directorio: se omiten\n")
+        comparativa = detector.analizar_corpus(corpus, procesos=procesos)
+        detector.guardar_resultados('resultados_comparativos.json')
+        detector.generar_web_comparativa('analisis_comparativo.html')
+
+        print("\n" + "="*80)
+        print("✅ ANÁLISIS COMPARATIVO COMPLETADO")
+        print("="*80)
+        for c in comparativa['comparacion']:
+            print(f"📚 {c['etiqueta']:<25} 👨 {c['menciones_masculinas']:>9,}  "
+                  f"👩 {c['menciones_femeninas']:>9,}  📊 {c['ratio_sesgo']}:1  "
+                  f"{formatear_intervalo(c['intervalo_confianza'])}")
+        print("\n📁 Archivos generados:")
+        print("   - analisis_comparativo.html (🌐 página web comparativa)")
+        print("   - resultados_comparativos.json (datos completos por corpus)")
+        return
 
     # Ejecutar análisis
-    resultados = detector.analizar_directorio()
+    almacen = AlmacenSQLite(args.sqlite) if args.sqlite else None
+    try:
+        resultados = detector.analizar_directorio(procesos=procesos, almacen=almacen)
+    finally:
+        if almacen is not None:
+            almacen.cerrar()
 
     # Guardar resultados
     detector.guardar_resultados('resultados_deteccion_genero.json')
     detector.generar_reporte_texto('reporte_genero.txt')
-    detector.generar_web_interactiva('analisis_genero.html')
+    indice_terminos = detector.generar_indice_terminos('analisis_genero_terminos')
+    detector.generar_web_interactiva('analisis_genero.html', indice_terminos)
+    if args.columnar:
+        detector.exportar_columnar(args.columnar)
 
     # Imprimir resumen
     print("\n" + "="*80)
@@ -1073,9 +5501,11 @@ def main():
     resumen = resultados['resumen_general']
     print(f"👨 Menciones masculinas: {resumen['menciones_masculinas_total']:,}")
     print(f"👩 Menciones femeninas: {resumen['menciones_femeninas_total']:,}")
-    print(f"📊 Ratio de sesgo: {resumen['ratio_sesgo_general']}:1")
+    print(f"📊 Ratio de sesgo: {resumen['ratio_sesgo_general']}:1 "
+          f"{formatear_intervalo(resumen.get('intervalo_confianza'))}")
     print(f"\n📁 Archivos generados:")
     print(f"   - analisis_genero.html (🌐 página web interactiva)")
+    print("   - analisis_genero_terminos/ (índice de términos de la web)")
     print(f"   - resultados_deteccion_genero.json (datos completos)")
     print(f"   - reporte_genero.txt (resumen legible)")
 